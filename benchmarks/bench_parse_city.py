@@ -0,0 +1,84 @@
+# benchmarks/bench_parse_city.py
+"""
+Micro-benchmark: the old parse_city (re-sort CITY_LIST and compile a regex
+per city, per call) vs. the precompiled CityMatcher behind spreader.parse_city,
+cold (every address new) and with its LRU cache warm (addresses repeating, as
+they do across a week of jobs). Checks that both agree on every address.
+    python benchmarks/bench_parse_city.py --jobs 50000 --distinct 3000
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spreader import parse_city, CITY_LIST
+
+STREETS = ["Main St", "Broadway", "Oak Ave", "Forum Blvd", "Nifong Blvd", "High St", "Columbia Ave", "Clark Ln"]
+UNKNOWN_CITIES = ["Springfield", "Hannibal", "Joplin"]
+
+def legacy_parse_city(address):
+    # The pre-CityMatcher implementation, kept here for comparison
+    address = address.strip()
+    state_zip = re.search(r',?\s*[A-Z]{2}\s*\d{5}$', address)
+    if state_zip:
+        address = address[:state_zip.start()]
+    address_lower = address.lower()
+    for city in sorted(CITY_LIST, key=lambda c: -len(c)):
+        city_clean = city.replace("'", "").lower()
+        if address_lower.replace("'", "").endswith(city_clean):
+            return city
+        if re.search(rf"\b{re.escape(city_clean)}\b", address_lower.replace("'", "")):
+            return city
+    return ""
+
+def build_addresses(n, seed=1):
+    rng = random.Random(seed)
+    addresses = []
+    for _ in range(n):
+        city = rng.choice(CITY_LIST) if rng.random() < 0.9 else rng.choice(UNKNOWN_CITIES)
+        city = city.title() if rng.random() < 0.7 else city.upper()
+        unit = f" Apt {rng.randint(1, 40)}" if rng.random() < 0.2 else ""
+        tail = f", MO {rng.randint(63000, 65999)}" if rng.random() < 0.8 else ""
+        addresses.append(f"{rng.randint(100, 9999)} {rng.choice(STREETS)}{unit} {city}{tail}")
+    return addresses
+
+def time_it(fn, addresses):
+    t0 = time.perf_counter()
+    for address in addresses:
+        fn(address)
+    return time.perf_counter() - t0
+
+def main(args):
+    unique = build_addresses(args.jobs, seed=args.seed)
+    pool = build_addresses(args.distinct, seed=args.seed + 1)
+    rng = random.Random(args.seed)
+    repeating = [rng.choice(pool) for _ in range(args.jobs)]
+
+    mismatches = [a for a in unique[:args.check] if legacy_parse_city(a) != parse_city.__wrapped__(a)]
+    print(f"Checked {min(args.check, len(unique))} addresses against the old parser: {len(mismatches)} mismatches")
+    for a in mismatches[:5]:
+        print(f"  {a!r}: old {legacy_parse_city(a)!r}, new {parse_city.__wrapped__(a)!r}")
+
+    legacy = time_it(legacy_parse_city, unique)
+    parse_city.cache_clear()
+    cold = time_it(parse_city.__wrapped__, unique)
+    parse_city.cache_clear()
+    warm = time_it(parse_city, repeating)
+
+    print(f"{args.jobs} jobs, {len(CITY_LIST)} cities, {args.distinct} distinct addresses when cached")
+    print(f"  old per-city regex:    {legacy:7.3f}s  ({args.jobs / legacy:>10,.0f} jobs/s)")
+    print(f"  CityMatcher, no cache: {cold:7.3f}s  ({args.jobs / cold:>10,.0f} jobs/s)  {legacy / cold:5.1f}x")
+    print(f"  parse_city, cached:    {warm:7.3f}s  ({args.jobs / warm:>10,.0f} jobs/s)  {legacy / warm:5.1f}x")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=50_000)
+    parser.add_argument("--distinct", type=int, default=3000, help="Distinct addresses in the repeating workload")
+    parser.add_argument("--check", type=int, default=10_000, help="Addresses compared against the old parser")
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,176 @@
+# benchmarks/bench_throughput.py
+"""
+End-to-end throughput: full run_scrape_job runs (login, calendar, every job,
+exports) against the offline mock intranet, at several worker counts.
+Reports jobs/sec, p50/p95 seconds per job and peak RSS (Python plus Chromium
+when psutil is installed, this process only otherwise). No network needed:
+    python benchmarks/bench_throughput.py --jobs 120 --workers 1 4 8 16 --latency 100
+
+Save a run with --save and compare later runs against it with --baseline; a
+jobs/sec drop beyond --tolerance exits non-zero.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+from contextlib import redirect_stdout
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from mock_intranet import MockIntranet
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+class PeakRSS:
+    """Samples resident memory on a thread; with psutil, child processes (Chromium) count too."""
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        if psutil is None:
+            try:
+                import resource
+                # ru_maxrss is KiB on Linux; a process-lifetime peak, not per run
+                return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+            except ImportError:
+                return 0
+        proc = psutil.Process()
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.sample())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.sample())
+
+def run_once(engine, mock, workers, args):
+    output_dir = tempfile.mkdtemp(prefix="bench_throughput_")
+    options = engine.ScrapeOptions(
+        mode="week",
+        selected_day=mock.week_of.strftime("%m/%d/%y"),
+        workers=workers,
+        http_mode=args.http,
+        use_wo_cache=False,  # cold lookups every run; mock CIDs stay out of the real cache
+        block_profile=args.block_profile,
+        shards=args.processes,
+        output_dir=output_dir,
+    )
+    try:
+        with PeakRSS() as rss:
+            t0 = time.perf_counter()
+            with redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+                summary = asyncio.run(engine.run_scrape_job(options, engine.ScrapeReporter()))
+            elapsed = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    if summary is None:
+        raise RuntimeError("Scrape against the mock failed (login?)")
+    settled = summary["jobs"] + summary["failed"]
+    return {
+        "workers": workers,
+        "jobs": summary["jobs"],
+        "failed": summary["failed"],
+        "seconds": round(elapsed, 2),
+        "jobs_per_sec": round(settled / elapsed, 3),
+        "p50": round(summary["job_p50"], 3),
+        "p95": round(summary["job_p95"], 3),
+        "peak_rss_mb": round(rss.peak / 1_048_576, 1),
+    }
+
+def compare(rows, baseline_path, tolerance):
+    """Print the jobs/sec change per worker count; returns False on a regression."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {row["workers"]: row for row in json.load(f)["results"]}
+    ok = True
+    for row in rows:
+        base = baseline.get(row["workers"])
+        if not base:
+            continue
+        change = row["jobs_per_sec"] / base["jobs_per_sec"] - 1
+        flag = ""
+        if change < -tolerance:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"  {row['workers']:>3} workers: {base['jobs_per_sec']:.2f} → {row['jobs_per_sec']:.2f} jobs/s ({change:+.0%}){flag}")
+    return ok
+
+def main(args):
+    mock = MockIntranet(
+        jobs=args.jobs, latency=args.latency / 1000, jitter=args.jitter / 1000,
+        error_rate=args.error_rate, dynamic_delay=args.dynamic_delay / 1000, port=0,
+    )
+    base_url = mock.start()
+
+    # The engine reads these at import time
+    os.environ["SCRAPER_BASE_URL"] = base_url
+    os.environ["UNITY_USER"] = "bench"
+    os.environ["PASSWORD"] = "bench"
+    import scrape_runner as engine
+
+    print(f"{args.jobs} jobs, {args.latency:.0f}±{args.jitter:.0f} ms latency, "
+          f"error rate {args.error_rate:.0%}, http mode {'on' if args.http else 'off'}, "
+          f"rss {'psutil' if psutil else 'python only'}")
+    print(f"{'workers':>8}{'jobs/s':>10}{'p50 s':>9}{'p95 s':>9}{'peak MB':>10}{'failed':>8}{'total s':>9}")
+    rows = []
+    try:
+        for workers in args.workers:
+            row = run_once(engine, mock, workers, args)
+            rows.append(row)
+            print(f"{workers:>8}{row['jobs_per_sec']:>10.2f}{row['p50']:>9.2f}{row['p95']:>9.2f}"
+                  f"{row['peak_rss_mb']:>10.1f}{row['failed']:>8}{row['seconds']:>9.1f}")
+    finally:
+        mock.stop()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+    if args.baseline:
+        print(f"Against {args.baseline}:")
+        if not compare(rows, args.baseline, args.tolerance):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=100, help="ms per customer/WO response")
+    parser.add_argument("--jitter", type=float, default=30, help="± ms around --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--dynamic-delay", type=float, default=0.0, help="ms before WO sections are filled by script")
+    parser.add_argument("--http", action="store_true", help="Use the HTTP fast path")
+    parser.add_argument("--processes", type=int, default=1, help="Shard over N processes")
+    parser.add_argument("--block-profile", default="lean")
+    parser.add_argument("--save", help="Write results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier --save to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed jobs/sec drop vs. baseline")
+    parser.add_argument("--verbose", action="store_true", help="Show the engine's own output")
+    sys.exit(main(parser.parse_args()))
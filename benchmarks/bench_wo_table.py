@@ -0,0 +1,79 @@
+# benchmarks/bench_wo_table.py
+"""
+Micro-benchmark: reading the customer Work Orders table cell by cell
+(the old get_work_order_url loop) vs. one eval_on_selector_all call.
+
+Runs against a synthetic table in a local page, no intranet needed:
+    python benchmarks/bench_wo_table.py --rows 12 --repeat 50
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright
+from utils import WO_TABLE_ROWS_SELECTOR, WO_TABLE_ROWS_JS, select_work_order
+
+STATUSES = ["Completed", "Cancelled", "In Process"]
+TYPES = ["Fiber Install", "Trouble Call", "Fiber Install", "Equipment Swap"]
+
+def build_table_html(n_rows):
+    rows = ["<tr><td>#</td><td>Date</td><td>Type</td><td>Status</td><td>View</td></tr>"]
+    for i in range(n_rows):
+        wo = 480000 + i
+        rows.append(
+            f"<tr><td>{wo}</td><td>2025-06-{(i % 28) + 1:02d}</td>"
+            f"<td>{TYPES[i % len(TYPES)]}</td><td>{STATUSES[i % len(STATUSES)]}</td>"
+            f"<td><a href='/workorders/view.php?nCount={wo}'>View</a></td></tr>"
+        )
+    return f"<div id='custWork'><div id='workShow'><table>{''.join(rows)}</table></div></div>"
+
+async def read_per_cell(frame):
+    # The pre-evaluate implementation: one CDP round trip per row, cell and link
+    table = []
+    for row in await frame.query_selector_all(WO_TABLE_ROWS_SELECTOR):
+        tds = await row.query_selector_all("td")
+        if len(tds) < 5:
+            continue
+        cells = [await td.inner_text() for td in tds]
+        link_td = await tds[4].query_selector("a")
+        href = await link_td.get_attribute("href") if link_td else None
+        table.append({"cells": cells, "href": href})
+    return table
+
+async def read_single_evaluate(frame):
+    return await frame.eval_on_selector_all(WO_TABLE_ROWS_SELECTOR, WO_TABLE_ROWS_JS)
+
+async def time_it(fn, frame, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        select_work_order(await fn(frame))
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95) - 1]
+
+async def main(rows, repeat):
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(build_table_html(rows))
+
+        # Both readers must agree before timing them
+        assert select_work_order(await read_per_cell(page)) == select_work_order(await read_single_evaluate(page))
+
+        print(f"{rows} WO rows, {repeat} repeats")
+        for label, fn in (("per-cell", read_per_cell), ("single evaluate", read_single_evaluate)):
+            p50, p95 = await time_it(fn, page, repeat)
+            print(f"  {label:<16} p50 {p50 * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+        await browser.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=12, help="Work order rows per customer")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,263 @@
+# benchmarks/mock_intranet.py
+"""
+Offline stand-in for the intranet, for benchmarks and debugging without the
+network. Serves the fixture pages in benchmarks/fixtures (login, calendar,
+customer menu + Work Orders frame, WO view) for a synthetic week of jobs, with
+configurable latency, jitter and error injection. Standard library only.
+
+    python benchmarks/mock_intranet.py --jobs 120 --latency 150 --jitter 50 --error-rate 0.02
+
+Then point the scraper at it (any username/password is accepted):
+    SCRAPER_BASE_URL=http://127.0.0.1:8765/ python main.py scrape --date 2025-06-16
+"""
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from string import Template
+from datetime import date, datetime, timedelta
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SESSION_COOKIE = "MOCKSESSID"
+
+SLOTS = ["8:00 - 10:00", "10:00 - 12:00", "12:00 - 2:00", "2:00 - 4:00"]
+FIRST_NAMES = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn", "Drew"]
+LAST_NAMES = ["Smith", "Johnson", "Brown", "Miller", "Davis", "Wilson", "Moore", "Clark", "Lewis", "Hall"]
+CITIES = ["Columbia", "Jefferson City", "Ashland", "Fulton", "Boonville", "Hallsville", "Holts Summit"]
+STREETS = ["Main St", "Broadway", "Oak Ave", "Forum Blvd", "Nifong Blvd", "High St", "Elm St"]
+PACKAGES = ["Fiber Internet", "Fiber Internet + Phone Bundle", "2.5 Gig Fiber", "5 Gig Fiber", ""]
+CONTRACTORS = ["Tech Crew A", "Tech Crew B", "Tech Crew C", "Fiber Pros LLC"]
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+        return Template(f.read())
+
+def build_jobs(n_jobs, week_of, seed=1, no_wo_rate=0.0):
+    """A reproducible week of calendar jobs; each has one customer and one WO."""
+    rng = random.Random(seed)
+    sunday = week_of - timedelta(days=(week_of.weekday() + 1) % 7)
+    jobs = []
+    for i in range(n_jobs):
+        city = rng.choice(CITIES)
+        jobs.append({
+            "cid": str(200000 + i * 7),
+            "wo": 500000 + i,
+            "date": (sunday + timedelta(days=1 + i % 6)).isoformat(),  # Mon-Sat
+            "time": rng.choice(SLOTS),
+            "title": "Residential Fiber Install",
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "city": city,
+            "address": f"{rng.randint(100, 9999)} {rng.choice(STREETS)} {city}, MO 65201",
+            "package": rng.choice(PACKAGES),
+            "description": "Connectorized drop" if rng.random() < 0.3 else "Standard install",
+            "contractor": rng.choice(CONTRACTORS),
+            "open_wo": rng.random() >= no_wo_rate,
+        })
+    return jobs
+
+class MockIntranet:
+    """
+    The mock server. latency/jitter are seconds per response on customer and
+    WO pages; error_rate answers 500 and rate_limit_rate answers 429 (with
+    Retry-After) on those pages; dynamic_delay > 0 fills the WO contractor and
+    event sections from a script after that many seconds, like the real site.
+    """
+    def __init__(self, jobs=60, week_of=None, latency=0.1, jitter=0.05, error_rate=0.0,
+                 rate_limit_rate=0.0, dynamic_delay=0.0, no_wo_rate=0.0, seed=1,
+                 host="127.0.0.1", port=8765):
+        self.week_of = week_of or date.today()
+        self.jobs = build_jobs(jobs, self.week_of, seed=seed, no_wo_rate=no_wo_rate)
+        self.by_cid = {job["cid"]: job for job in self.jobs}
+        self.by_wo = {job["wo"]: job for job in self.jobs}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.dynamic_delay = dynamic_delay
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.injected = 0
+        self.server = None
+        self.templates = {
+            name: load_fixture(f"{name}.html")
+            for name in ("login", "home", "calendar", "customer", "customer_frame", "workorder")
+        }
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        """Serve on a background thread; returns the base URL."""
+        handler = type("MockHandler", (_MockHandler,), {"mock": self})
+        self.server = ThreadingHTTPServer((self.host, self.port), handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="MockIntranet", daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def delay(self):
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    def injected_error(self):
+        """None, or the status code to answer instead of the page."""
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+    # Pages
+    def calendar_page(self):
+        return self.templates["calendar"].substitute(
+            events=json.dumps(self.jobs),
+            start_date=date.today().isoformat(),
+            render_delay=50,
+        )
+
+    def customer_page(self, cid):
+        job = self.by_cid.get(cid)
+        return self.templates["customer"].substitute(cid=cid, name=job["name"] if job else "Unknown")
+
+    def customer_frame(self, cid):
+        job = self.by_cid.get(cid)
+        rows = []
+        if job:
+            # An older completed install and a trouble call around the WO that matters
+            rows.append(self._wo_row(job["wo"] - 100000, "Fiber Install", "Completed"))
+            rows.append(self._wo_row(job["wo"] + 100000, "Trouble Call", "In Process"))
+            rows.append(self._wo_row(job["wo"], "Fiber Install", "In Process" if job["open_wo"] else "Cancelled"))
+        return self.templates["customer_frame"].substitute(rows="\n".join(rows))
+
+    def _wo_row(self, wo, wo_type, status):
+        return (
+            f"        <tr><td>{wo}</td><td>{self.week_of.isoformat()}</td><td>{wo_type}</td>"
+            f"<td>{status}</td><td><a href='/workorders/view.php?nCount={wo}'>View</a></td></tr>"
+        )
+
+    def workorder_page(self, wo):
+        job = self.by_wo.get(wo)
+        if job is None:
+            return None
+        contractors = f"<b>{job['contractor']} - (Primary)</b>"
+        events = f"Fiber Install {job['date']} {job['time']}"
+        script = ""
+        if self.dynamic_delay > 0:
+            # Like the real page: both sections arrive from a script after load
+            script = (
+                "<script>setTimeout(function () {"
+                f"document.getElementById('ContractorList').innerHTML = {json.dumps(contractors)};"
+                f"document.getElementById('scheduledEventList').innerText = {json.dumps(events)};"
+                f"}}, {int(self.dynamic_delay * 1000)});</script>"
+            )
+            contractors = events = ""
+        return self.templates["workorder"].substitute(
+            wo=wo, cid=job["cid"], name=job["name"], address=job["address"],
+            package=job["package"], description=job["description"],
+            contractors=contractors, events=events, script=script,
+        )
+
+class _MockHandler(BaseHTTPRequestHandler):
+    mock = None  # set per server by MockIntranet.start
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    def _logged_in(self):
+        return f"{SESSION_COOKIE}=" in (self.headers.get("Cookie") or "")
+
+    def _send(self, status, body="", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location, headers=None):
+        self._send(302, "", {"Location": location, **(headers or {})})
+
+    def do_POST(self):
+        if urlparse(self.path).path == "/system/login.php":
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self._redirect("/", {"Set-Cookie": f"{SESSION_COOKIE}=mock-session; Path=/"})
+        else:
+            self._send(404, "Not found")
+
+    def do_GET(self):
+        mock = self.mock
+        mock.requests += 1
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == "/system/login.php":
+            return self._send(200, mock.templates["login"].substitute())
+        if not self._logged_in():
+            return self._redirect("/system/login.php")
+        if url.path == "/":
+            return self._send(200, mock.templates["home"].substitute())
+        if url.path == "/events/calendar.php":
+            return self._send(200, mock.calendar_page())
+
+        # Per-job pages get the latency and error injection
+        if url.path in ("/menu.php", "/customer/workorders.php", "/workorders/view.php"):
+            mock.delay()
+            status = mock.injected_error()
+            if status:
+                mock.injected += 1
+                return self._send(status, f"Injected {status}", {"Retry-After": "1"} if status == 429 else None)
+
+        if url.path == "/menu.php":
+            return self._send(200, mock.customer_page(query.get("customerid", [""])[0]))
+        if url.path == "/customer/workorders.php":
+            return self._send(200, mock.customer_frame(query.get("customerid", [""])[0]))
+        if url.path == "/workorders/view.php":
+            try:
+                body = mock.workorder_page(int(query.get("nCount", ["0"])[0]))
+            except ValueError:
+                body = None
+            return self._send(200, body) if body else self._send(404, "No such work order")
+        return self._send(404, "Not found")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--jobs", type=int, default=60, help="Calendar jobs in the week")
+    parser.add_argument("--week-of", help="Any day of the week to fill (YYYY-MM-DD); default today")
+    parser.add_argument("--latency", type=float, default=100, help="ms per customer/WO response")
+    parser.add_argument("--jitter", type=float, default=30, help="± ms around --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction answered with HTTP 429")
+    parser.add_argument("--dynamic-delay", type=float, default=0.0, help="ms before WO sections are filled by script")
+    parser.add_argument("--no-wo-rate", type=float, default=0.0, help="Fraction of customers without an open WO")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    mock = MockIntranet(
+        jobs=args.jobs,
+        week_of=datetime.strptime(args.week_of, "%Y-%m-%d").date() if args.week_of else None,
+        latency=args.latency / 1000, jitter=args.jitter / 1000,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        dynamic_delay=args.dynamic_delay / 1000, no_wo_rate=args.no_wo_rate,
+        seed=args.seed, port=args.port,
+    )
+    print(f"Mock intranet with {len(mock.jobs)} jobs (week of {mock.week_of}) at {mock.start()}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
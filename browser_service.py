@@ -0,0 +1,206 @@
+# browser_service.py
+import time
+import asyncio
+import threading
+from collections import defaultdict
+
+from scraper_core import init_playwright_page, RouteStats
+from utils import LoginSession, is_login_page, BASE_URL
+
+WARM_CONTEXTS = 4       # contexts kept ready after start()
+MAX_POOLED = 32         # idle contexts kept per block profile (the worker maximum)
+MAX_CONTEXT_USES = 50   # recycle a context after this many leases to cap memory growth
+SESSION_CHECK_INTERVAL = 60  # seconds a passed login probe is trusted before probing again
+
+class _RouteStatsRelay:
+    """
+    Stands in for a RouteStats on a pooled context; the block routes are
+    installed once, so counts are forwarded to whichever run holds the lease.
+    """
+    def __init__(self):
+        self.target = None
+        self._scratch = RouteStats()
+
+    @property
+    def blocked(self):
+        return (self.target or self._scratch).blocked
+
+    def on_response(self, response):
+        if self.target is not None:
+            self.target.on_response(response)
+
+class _PooledContext:
+    def __init__(self, context, page, profile, state, relay):
+        self.context = context
+        self.page = page      # a ready page for the next lease, or None
+        self.profile = profile
+        self.state = state    # the login state the context was seeded from
+        self.relay = relay
+        self.uses = 0
+
+class BrowserService:
+    """
+    One long-lived Playwright + Chromium for the GUI session, on its own event
+    loop thread. Keeps the login state and a pool of logged-in contexts (per
+    block profile) warm, so back-to-back runs skip launch and login.
+    Use submit()/run() from other threads; lease()/release() on the service loop.
+    """
+    def __init__(self, warm_contexts=WARM_CONTEXTS, log=print):
+        self.warm_contexts = warm_contexts
+        self.log = log
+        self.playwright = None
+        self.browser = None
+        self.session = LoginSession(log=log)
+        self.launches = 0
+        self._session_checked = 0.0
+        self._pool = defaultdict(list)
+        self._leased = {}
+        self._lock = None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="BrowserService", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        """Schedule coro on the service loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro):
+        """Blocking submit() for background threads."""
+        return self.submit(coro).result()
+
+    @property
+    def is_warm(self):
+        return self.browser is not None and self.browser.is_connected()
+
+    async def start(self, block_profile="images"):
+        """
+        Launch and log in if needed (or relaunch after a crash), and make sure
+        the stored session still works; cheap when warm and recently checked.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            launched = False
+            if not self.is_warm:
+                await self._close_browser()
+                fresh_login = self.session.state is None
+                self.playwright, self.browser, context, page = await init_playwright_page(
+                    headless=True, storage_state=self.session.state, block_profile=block_profile
+                )
+                self.launches += 1
+                try:
+                    await self.session.ensure(page)
+                finally:
+                    await page.close()
+                    await context.close()
+                if fresh_login:
+                    # handle_login just checked the session on that page
+                    self._session_checked = time.monotonic()
+                launched = True
+            await self._check_session(block_profile)
+            if launched:
+                await self.warm(block_profile, self.warm_contexts)
+
+    async def _check_session(self, block_profile):
+        """Probe the stored session; on a login redirect, log in again and recycle the pool."""
+        if time.monotonic() - self._session_checked < SESSION_CHECK_INTERVAL:
+            return
+        entry = await self._new_entry(block_profile)
+        try:
+            await entry.page.goto(BASE_URL)
+            if is_login_page(entry.page):
+                self.log("🔐 Stored session expired, logging in again…")
+                await self.session.refresh(entry.page, entry.state)
+                # Idle contexts carry the dead cookies; leased ones are dropped on release
+                for pool in self._pool.values():
+                    for stale in pool:
+                        await self._close_entry(stale)
+                    pool.clear()
+        finally:
+            await self._close_entry(entry)
+        self._session_checked = time.monotonic()
+
+    async def warm(self, block_profile="images", count=WARM_CONTEXTS):
+        """Top the idle pool for block_profile up to count contexts."""
+        pool = self._pool[block_profile]
+        while len(pool) < count:
+            pool.append(await self._new_entry(block_profile))
+
+    async def lease(self, block_profile="images", route_stats=None):
+        """A logged-in (context, page) for one worker; give it back with release()."""
+        await self.start(block_profile)
+        pool = self._pool[block_profile]
+        entry = page = None
+        while pool and page is None:
+            entry = pool.pop()
+            if entry.state is not self.session.state:
+                # Seeded before a re-login; its cookies are stale
+                await self._close_entry(entry)
+                continue
+            try:
+                page = entry.page or await entry.context.new_page()
+            except Exception:
+                await self._close_entry(entry)
+        if page is None:
+            entry = await self._new_entry(block_profile)
+            page = entry.page
+        entry.page = None
+        entry.uses += 1
+        entry.relay.target = route_stats
+        self._leased[entry.context] = entry
+        return entry.context, page
+
+    async def release(self, context, page):
+        """Return a leased context to the pool, or close it if it is stale or worn out."""
+        entry = self._leased.pop(context, None)
+        try:
+            await page.close()
+        except Exception:
+            pass
+        if entry is None:
+            await context.close()
+            return
+        entry.relay.target = None
+        pool = self._pool[entry.profile]
+        healthy = self.is_warm and entry.state is self.session.state
+        if healthy and entry.uses < MAX_CONTEXT_USES and len(pool) < MAX_POOLED:
+            pool.append(entry)
+        else:
+            await self._close_entry(entry)
+
+    async def _new_entry(self, block_profile):
+        relay = _RouteStatsRelay()
+        state = self.session.state
+        context, page = await init_playwright_page(
+            browser=self.browser, playwright=self.playwright, storage_state=state,
+            block_profile=block_profile, route_stats=relay
+        )
+        return _PooledContext(context, page, block_profile, state, relay)
+
+    async def _close_entry(self, entry):
+        try:
+            await entry.context.close()
+        except Exception:
+            pass
+
+    async def _close_browser(self):
+        for pool in self._pool.values():
+            for entry in pool:
+                await self._close_entry(entry)
+        self._pool.clear()
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+        if self.playwright is not None:
+            await self.playwright.stop()
+        self.playwright = self.browser = None
+        self._session_checked = 0.0
+
+    def shutdown(self):
+        """Close the browser and stop the loop thread (call once, from any other thread)."""
+        try:
+            self.run(self._close_browser())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
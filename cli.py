@@ -0,0 +1,148 @@
+# cli.py
+import os
+import sys
+import json
+import time
+import asyncio
+import traceback
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from scrape_runner import ScrapeOptions, ScrapeReporter, run_scrape_job
+from scraper_core import BLOCK_PROFILES
+from utils import ensure_playwright, parse_imported_jobs
+
+class JsonLogReporter(ScrapeReporter):
+    """
+    Structured progress for cron/servers: one JSON object per line on `stream`,
+    e.g. {"ts": "...", "event": "progress", "done": 3, "total": 40, ...}.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.t0 = None
+
+    def emit(self, event, **fields):
+        entry = {"ts": datetime.now().isoformat(timespec="seconds"), "event": event, **fields}
+        self.stream.write(json.dumps(entry, default=str) + "\n")
+        self.stream.flush()
+
+    def log(self, msg):
+        self.emit("log", msg=msg)
+
+    def error(self, msg):
+        self.emit("error", msg=msg)
+
+    def start(self, total):
+        self.t0 = time.perf_counter()
+        self.emit("start", total=total)
+
+    def job_finished(self, done, total, job, result):
+        elapsed = time.perf_counter() - self.t0
+        self.emit(
+            "progress", done=done, total=total, cid=job.get("cid"), ok=bool(result),
+            error=None if result else job.get("error"),
+            jobs_per_sec=round(done / elapsed, 3) if elapsed else None,
+        )
+
+    def spread_ready(self, spread_file):
+        self.emit("spread", file=spread_file)
+
+def add_scrape_arguments(parser):
+    parser.add_argument("--mode", choices=["day", "week", "range"], default="week")
+    parser.add_argument("--date", help="Day to scrape (or any day in the week, or the range start), MM/DD/YY or YYYY-MM-DD; default today")
+    parser.add_argument("--end", help="Last day of a --mode range scrape, MM/DD/YY or YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, default=6, help="Worker count (ceiling with --adaptive)")
+    parser.add_argument("--excel", action="store_true", help="Also export an Excel file")
+    parser.add_argument("--email", action="store_true", help="Email the results")
+    parser.add_argument("--http", action="store_true", help="HTTP fast path with browser fallback")
+    parser.add_argument("--adaptive", action="store_true", help="Adapt concurrency to server latency")
+    parser.add_argument("--processes", type=int, default=1, help="Shard jobs over N processes, each with its own Chromium")
+    parser.add_argument("--no-wo-cache", action="store_true", help="Skip the on-disk WO lookup cache")
+    parser.add_argument("--block-profile", choices=list(BLOCK_PROFILES), default="lean")
+    parser.add_argument("--previous", help="Previous result file; enables incremental re-scrape and a changes file")
+    parser.add_argument("--spread", action="store_true", help="Run the (experimental) spreader on the output")
+    parser.add_argument("--resume", action="store_true", help="Resume the last unfinished run")
+    parser.add_argument("--test-limit", type=int, help="Only scrape this many jobs")
+    parser.add_argument("--every", type=float, help="Daemon mode: repeat the scrape every N minutes")
+    har = parser.add_mutually_exclusive_group()
+    har.add_argument("--record-har", metavar="DIR", help="Archive the run's intranet traffic into DIR (must be empty)")
+    har.add_argument("--replay-har", metavar="DIR", help="Serve the run from the recording in DIR, offline; outputs go to DIR/Replay")
+
+def parse_cli_date(value):
+    """Accept MM/DD/YY (the GUI's format) or YYYY-MM-DD; returns MM/DD/YY."""
+    if not value:
+        return datetime.now().strftime("%m/%d/%y")
+    for fmt in ("%m/%d/%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%m/%d/%y")
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date {value!r}; use MM/DD/YY or YYYY-MM-DD")
+
+def options_from_args(args):
+    if args.mode == "range" and not args.end:
+        raise ValueError("--mode range needs --end")
+    imported_jobs = parse_imported_jobs(args.previous) if args.previous else None
+    return ScrapeOptions(
+        mode=args.mode,
+        selected_day=parse_cli_date(args.date),
+        end_day=parse_cli_date(args.end) if args.end else None,
+        workers=args.workers,
+        http_mode=args.http,
+        adaptive=args.adaptive,
+        use_wo_cache=not args.no_wo_cache,
+        incremental=bool(imported_jobs),
+        block_profile=args.block_profile,
+        test_mode=args.test_limit is not None,
+        test_limit=args.test_limit or 10,
+        export_excel=args.excel,
+        send_email=args.email,
+        run_spreader=args.spread,
+        imported_jobs=imported_jobs,
+        resume=args.resume,
+        shards=args.processes,
+        har_mode="record" if args.record_har else "replay" if args.replay_har else None,
+        har_dir=args.record_har or args.replay_har,
+    )
+
+def run_cli(args):
+    """`main.py scrape ...`: one headless run (or one per --every minutes). Returns an exit code."""
+    # JSON events own stdout; the engine's debug prints go to stderr
+    reporter = JsonLogReporter(sys.stdout)
+    if not (os.getenv("UNITY_USER") and os.getenv("PASSWORD")):
+        reporter.emit("error", msg="No stored credentials; set UNITY_USER and PASSWORD in Misc/.env or the environment")
+        return 2
+    try:
+        options = options_from_args(args)
+    except ValueError as e:
+        reporter.emit("error", msg=str(e))
+        return 2
+
+    with redirect_stdout(sys.stderr):
+        try:
+            ensure_playwright()
+        except Exception as e:
+            traceback.print_exc()
+            reporter.emit("error", msg=f"Playwright setup failed: {e}")
+            return 1
+        while True:
+            try:
+                summary = asyncio.run(run_scrape_job(options, reporter))
+            except Exception as e:
+                traceback.print_exc()
+                reporter.emit("error", msg=f"Scrape crashed: {e}")
+                summary = None
+            if summary is None:
+                exit_code = 1
+            else:
+                exit_code = 0
+                reporter.emit("finished", **{k: v for k, v in summary.items() if k != "stats"})
+
+            if not args.every:
+                return exit_code
+            reporter.emit("sleep", minutes=args.every)
+            time.sleep(args.every * 60)
+            # Daemon runs follow the calendar unless pinned with --date
+            options.resume = False
+            if not args.date:
+                options.selected_day = parse_cli_date(None)
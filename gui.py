@@ -11,8 +11,9 @@ from tkinter import messagebox
 from utils import parse_imported_jobs, assign_contractor
 from scrape_runner import run_scrape
 from spreader import parse_moved_jobs_from_spread
-from scraper_core import init_playwright_page
-from utils import handle_login, ensure_playwright, __version__, prompt_reassignment
+from scraper_core import BLOCK_PROFILES
+from browser_service import BrowserService
+from utils import ensure_playwright, __version__, prompt_reassignment, WORK_ORDER_URL_TEMPLATE
 
 class CalendarBuddyGUI:
     def __init__(self, root):
@@ -31,7 +32,15 @@ class CalendarBuddyGUI:
         self.export_excel = tk.BooleanVar(value=False)
         self.send_email = tk.BooleanVar(value=False)
         self.run_spreader = tk.BooleanVar(value=True)
+        self.http_mode = tk.BooleanVar(value=False)
+        self.adaptive_workers = tk.BooleanVar(value=False)
+        self.use_wo_cache = tk.BooleanVar(value=True)
+        self.incremental = tk.BooleanVar(value=False)
+        self.block_profile = tk.StringVar(value="lean")
+        self.shard_count = tk.IntVar(value=1)
+        self.resume_requested = False
         self.base_date = tk.StringVar()
+        self.end_date = tk.StringVar()
 
         # === File Input Section ===
         file_frame = ttk.LabelFrame(root, text="Import Job File")
@@ -52,6 +61,8 @@ class CalendarBuddyGUI:
         ttk.Checkbutton(settings_frame, text="Test Mode", variable=self.test_mode).grid(row=0, column=0, sticky="w", padx=10, pady=5)
         ttk.Label(settings_frame, text="Test Mode Limit:").grid(row=0, column=1, sticky="e")
         ttk.Spinbox(settings_frame, from_=1, to=500, textvariable=self.test_limit, width=5).grid(row=0, column=2, sticky="w")
+        ttk.Checkbutton(settings_frame, text="HTTP Mode (fast)", variable=self.http_mode).grid(row=0, column=3, sticky="e", padx=10)
+        ttk.Checkbutton(settings_frame, text="Use WO Cache", variable=self.use_wo_cache).grid(row=0, column=4, sticky="w", padx=10)
 
         ttk.Label(settings_frame, text="Worker Threads:").grid(row=1, column=0, sticky="w", padx=10)
         ttk.Spinbox(settings_frame, from_=1, to=32, textvariable=self.worker_count, width=5).grid(row=1, column=1, sticky="w")
@@ -65,12 +76,24 @@ class CalendarBuddyGUI:
 
         ttk.Radiobutton(settings_frame, text="Full Week", variable=self.scrape_mode_choice, value="week").grid(row=2, column=2, sticky="w")
         ttk.Radiobutton(settings_frame, text="Single Day", variable=self.scrape_mode_choice, value="day").grid(row=2, column=3, sticky="w")
+        ttk.Checkbutton(settings_frame, text="Incremental", variable=self.incremental).grid(row=2, column=4, sticky="w", padx=10)
+
+        ttk.Label(settings_frame, text="Block Profile:").grid(row=3, column=0, sticky="w", padx=10, pady=(5, 0))
+        ttk.Combobox(settings_frame, textvariable=self.block_profile, values=list(BLOCK_PROFILES), state="readonly", width=10).grid(row=3, column=1, sticky="w", pady=(5, 0))
+        ttk.Label(settings_frame, text="Processes:").grid(row=3, column=2, sticky="e", pady=(5, 0))
+        ttk.Spinbox(settings_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.shard_count, width=5).grid(row=3, column=3, sticky="w", padx=10, pady=(5, 0))
+        ttk.Checkbutton(settings_frame, text="Adaptive Workers", variable=self.adaptive_workers).grid(row=3, column=4, sticky="w", padx=10, pady=(5, 0))
+
+        ttk.Label(settings_frame, text="End Date:").grid(row=4, column=0, sticky="w", padx=10, pady=(5, 0))
+        DateEntry(settings_frame, textvariable=self.end_date, width=12).grid(row=4, column=1, sticky="w", pady=(5, 0))
+        ttk.Radiobutton(settings_frame, text="Date Range", variable=self.scrape_mode_choice, value="range").grid(row=4, column=2, sticky="w")
 
         # === Action Buttons ===
         button_frame = ttk.Frame(root)
         button_frame.pack(pady=10)
 
         ttk.Button(button_frame, text="Run Job Scrape", command=self.start_scrape_thread).pack(side="left", padx=20)
+        ttk.Button(button_frame, text="Resume Last Run", command=self.resume_scrape_thread).pack(side="left", padx=20)
 
         # === Log Console ===
         log_frame = ttk.LabelFrame(root, text="Output Log")
@@ -93,26 +116,77 @@ class CalendarBuddyGUI:
         self.counter_label = ttk.Label(footer_frame, text="0 of 0 completed (0%)")
         self.counter_label.pack(side="right")
 
+        # One warm browser for the whole session, shared by scrapes and reassignments
+        self.browser_service = BrowserService(log=self.log)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.warm_browser()
+
+    def warm_browser(self):
+        # Only with stored credentials; otherwise the first run prompts as before
+        if not (os.getenv("UNITY_USER") and os.getenv("PASSWORD")):
+            return
+        def done(future):
+            if future.exception():
+                print(f"Browser warm-up failed: {future.exception()}")
+        self.browser_service.submit(self.browser_service.start(self.block_profile.get())).add_done_callback(done)
+
+    def on_close(self):
+        try:
+            self.browser_service.shutdown()
+        except Exception as e:
+            print(f"Browser service shutdown failed: {e}")
+        self.root.destroy()
+
     def log(self, message):
         timestamp = time.strftime("[%H:%M:%S]")
         self.log_text.insert(tk.END, f"{timestamp} {message}\n")
         self.log_text.see(tk.END)
 
     def handle_drop(self, event):
-        self.dropped_file_path = event.data.strip('{}')
-        self.file_label.config(text=f"Loaded: {os.path.basename(self.dropped_file_path)}")
-        self.log(f"📁 Loaded file: {self.dropped_file_path}")
-        self.imported_jobs = parse_imported_jobs(self.dropped_file_path)
-        self.log(f"✅ Parsed {len(self.imported_jobs)} imported jobs.")
+        self.import_file(event.data.strip('{}'))
 
     def browse_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("Excel files", "*.xlsx")])
         if file_path:
-            self.dropped_file_path = file_path
-            self.file_label.config(text=f"Loaded: {os.path.basename(file_path)}")
-            self.log(f"📁 Loaded file: {file_path}")
-            self.imported_jobs = parse_imported_jobs(file_path)
-            self.log(f"✅ Parsed {len(self.imported_jobs)} imported jobs.")
+            self.import_file(file_path)
+
+    def import_file(self, file_path):
+        # Parsing runs on a worker thread; widgets are only touched via root.after
+        self.dropped_file_path = file_path
+        self.file_label.config(text=f"Loading: {os.path.basename(file_path)}…")
+        self.log(f"📁 Loading file: {file_path}")
+        self.progress_var.set(0)
+
+        def progress(done, total):
+            if total:
+                self.root.after(0, self._show_import_progress, done, total)
+
+        def worker():
+            try:
+                jobs = parse_imported_jobs(file_path, progress=progress)
+            except Exception as e:
+                self.root.after(0, self._import_failed, file_path, e)
+                return
+            self.root.after(0, self._import_done, file_path, jobs)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _show_import_progress(self, done, total):
+        self.progress_bar["maximum"] = total
+        self.progress_var.set(done)
+        self.counter_label.config(text=f"Importing… {done / total * 100:.0f}%")
+
+    def _import_done(self, file_path, jobs):
+        self.imported_jobs = jobs
+        self.file_label.config(text=f"Loaded: {os.path.basename(file_path)}")
+        self.counter_label.config(text=f"Imported {len(jobs)} jobs")
+        self.log(f"✅ Parsed {len(jobs)} imported jobs.")
+
+    def _import_failed(self, file_path, error):
+        self.imported_jobs = None
+        self.file_label.config(text="No file loaded.")
+        self.counter_label.config(text="0 of 0 completed (0%)")
+        self.log(f"❌ Could not import {os.path.basename(file_path)}: {error}")
 
     def reset_throughput(self):
         self.start_time = None
@@ -151,13 +225,17 @@ class CalendarBuddyGUI:
 
             # Proceed with async scraping
             try:
-                asyncio.run(run_scrape(self))
+                self.browser_service.run(run_scrape(self))
             except Exception as e:
                 print(f"Error in run_scrape: {e}")
 
         self.reset_throughput()
         threading.Thread(target=target, daemon=True).start()
 
+    def resume_scrape_thread(self):
+        self.resume_requested = True
+        self.start_scrape_thread()
+
     def show_approve_spread_popup(self, spread_file):
         if not self.run_spreader.get():
             return
@@ -182,18 +260,16 @@ class CalendarBuddyGUI:
         self.start_time  = time.perf_counter()
 
         def _bg():
-            asyncio.run(self._apply_spreader_async(jobs, total, workers))
+            self.browser_service.run(self._apply_spreader_async(jobs, total, workers))
         threading.Thread(target=_bg, daemon=True).start()
 
 
     async def _apply_spreader_async(self, jobs, total, workers):
-        p, browser, context, _ = await init_playwright_page(headless=True)
+        # 1) borrow a warm, logged-in context from the browser service
+        context, page0 = await self.browser_service.lease()
+        pages = []
 
         try:
-            # 1) log in ONCE on page0
-            page0 = await context.new_page()
-            await handle_login(page0, log=self.log)
-
             # 2) create your pool of pages
             pages = [await context.new_page() for _ in range(workers)]
             sem   = asyncio.Semaphore(workers)
@@ -202,7 +278,7 @@ class CalendarBuddyGUI:
                 async with sem:
                     page = pages.pop()
                     try:
-                        url = f"http://inside.sockettelecom.com/workorders/view.php?nCount={job['wo']}"
+                        url = WORK_ORDER_URL_TEMPLATE.format(job['wo'])
                         await page.goto(url)
                         await asyncio.sleep(1)  # give UI time
                         await assign_contractor(page, job["wo"], job["contractor"], log=self.log)
@@ -224,9 +300,9 @@ class CalendarBuddyGUI:
                     self.log(f"⚠️ Error in worker: {r}")
 
         finally:
-            await context.close()
-            await browser.close()
-            await p.stop()
+            for page in pages:
+                await page.close()
+            await self.browser_service.release(context, page0)
             self.log("✅ Reassignment complete.")
 
 
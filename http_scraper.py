@@ -0,0 +1,234 @@
+# http_scraper.py
+import json
+from urllib.parse import urljoin
+
+import httpx
+from bs4 import BeautifulSoup
+
+from utils import (
+    NoWOError, NoOpenWOError, STATE_PATH,
+    select_work_order, classify_job_type, pick_contractor, parse_wo_date_text
+)
+from scraper_core import CUSTOMER_URL_TEMPLATE, process_job_entries
+from wo_cache import wo_page_matches
+from throttle import RATE_LIMIT_CODES, parse_retry_after
+from retry import RateLimitedError, PERMANENT, classify_failure
+from instrumentation import StageTimer
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+
+class HttpFallback(Exception):
+    """The page could not be handled over plain HTTP; retry this job in the browser."""
+    pass
+
+def load_state_cookies(state=None):
+    """
+    Build an httpx cookie jar from a Playwright storage state.
+    state can be the dict returned by context.storage_state(), a path to a
+    state file, or None to read the saved state (Misc/state.json).
+    """
+    if state is None:
+        state = STATE_PATH
+    if isinstance(state, str):
+        with open(state, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+    cookies = httpx.Cookies()
+    for c in state.get("cookies", []):
+        cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+    return cookies
+
+def create_http_client(state=None, max_connections=32, on_status=None):
+    """
+    Pooled async client carrying the logged-in session cookies.
+    on_status(status, headers) is called for every response, e.g. AdaptiveLimiter.on_status.
+    """
+    event_hooks = {}
+    if on_status:
+        async def _status_hook(response):
+            on_status(response.status_code, response.headers)
+        event_hooks["response"] = [_status_hook]
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+    )
+    return httpx.AsyncClient(
+        cookies=load_state_cookies(state),
+        limits=limits,
+        timeout=httpx.Timeout(15.0),
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+        event_hooks=event_hooks,
+    )
+
+async def _get_html(client, url):
+    resp = await client.get(url)
+    if resp.status_code in RATE_LIMIT_CODES:
+        # Retry later over HTTP; the browser would be refused too
+        raise RateLimitedError(resp.status_code, parse_retry_after(resp.headers.get("retry-after")))
+    if "login.php" in str(resp.url):
+        raise HttpFallback("Session cookies rejected (redirected to login)")
+    resp.raise_for_status()
+    return str(resp.url), resp.text
+
+def _text(el, sep=" "):
+    # Collapse whitespace the way inner_text() does for table cells
+    return " ".join(el.get_text(sep).split()) if el else ""
+
+def parse_work_order_rows(html):
+    """Rows of #custWork #workShow table as {"cells": [...], "href": ...}, or None if the table is missing."""
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.select_one("#custWork #workShow table")
+    if table is None:
+        return None
+
+    rows = []
+    for tr in table.find_all("tr"):
+        tds = tr.find_all("td")
+        if len(tds) < 5:
+            continue
+        link = tds[4].find("a")
+        rows.append({
+            "cells": [_text(td) for td in tds],
+            "href": link.get("href") if link else None,
+        })
+    return rows
+
+def parse_work_order_page(html):
+    """
+    Pull the fields process_job_entries reads off a workorders/view.php page.
+    Raises HttpFallback when a section is only filled in by the page's scripts.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    addr_elem = soup.select_one("a[href*='viewServiceMap']")
+    address = _text(addr_elem) or "Unknown"
+
+    pkg_elem = soup.select_one(".packageName.text-indent b")
+    package_info = _text(pkg_elem)
+
+    desc_text = ""
+    for header in soup.select("td.detailHeader"):
+        if "Description:" in header.get_text():
+            data = header.find_next_sibling("td")
+            desc_text = _text(data).lower()
+            break
+
+    contractor_list = soup.select_one(".contractorsection #ContractorList")
+    names = contractor_list.find_all("b") if contractor_list is not None else []
+    if not names:
+        # Missing or still empty: the page's script fills it in after load
+        raise HttpFallback("Contractor list not present in static HTML")
+    contractor = pick_contractor([_text(b) for b in names])
+
+    events = soup.select_one("#scheduledEventList")
+    event_text = events.get_text("\n").strip() if events else ""
+    job_date = parse_wo_date_text(event_text)
+    if job_date == "Unknown":
+        raise HttpFallback("Scheduled events not present in static HTML")
+
+    job_type = classify_job_type(package_info, desc_text, address)
+    return contractor, job_date, job_type, address
+
+async def _resolve_work_order(client, cid):
+    customer_url, html = await _get_html(client, CUSTOMER_URL_TEMPLATE.format(cid))
+
+    # The WO table lives in the MainView iframe document
+    soup = BeautifulSoup(html, "html.parser")
+    iframe = soup.select_one('iframe[name="MainView"]')
+    if iframe and iframe.get("src"):
+        _, html = await _get_html(client, urljoin(customer_url, iframe["src"]))
+
+    rows = parse_work_order_rows(html)
+    if rows is None:
+        raise HttpFallback("Work Orders table not present in static HTML")
+
+    workorder_url, wo_number = select_work_order(rows)
+    return (urljoin(customer_url, workorder_url) if workorder_url else None), wo_number
+
+async def fetch_job_details(client, job, log=print, wo_cache=None, timer=None):
+    """
+    HTTP counterpart of scraper_core.process_job_entries: same result dict,
+    None for jobs with no usable WO. Raises HttpFallback when the browser is needed.
+    """
+    cid = job.get("cid")
+    timer = timer or StageTimer()
+
+    try:
+        wo_html = workorder_url = wo_number = None
+
+        cached = wo_cache.get(cid) if wo_cache else None
+        if cached:
+            cached_url, cached_wo = cached
+            with timer.stage("cached_wo_page"):
+                _, html = await _get_html(client, cached_url)
+                matches = wo_page_matches(BeautifulSoup(html, "html.parser").get_text(" "), cid, cached_wo)
+            if matches:
+                wo_html, workorder_url, wo_number = html, cached_url, cached_wo
+            else:
+                log(f"[{cid}] Cached WO {cached_wo} no longer matches, looking it up again")
+                wo_cache.invalidate(cid)
+
+        if wo_html is None:
+            try:
+                with timer.stage("http_wo_lookup"):
+                    workorder_url, wo_number = await _resolve_work_order(client, cid)
+            except (NoWOError, NoOpenWOError) as e:
+                job["error"] = str(e)
+                job["failure"] = PERMANENT
+                log(f"[{cid}] No work order found: {e}")
+                return None
+
+            if not workorder_url:
+                log(f"[{cid}] No workorder_url found, skipping job")
+                return None
+            if wo_cache:
+                wo_cache.put(cid, workorder_url, wo_number)
+
+            with timer.stage("http_wo_page"):
+                _, wo_html = await _get_html(client, workorder_url)
+
+        with timer.stage("http_parse"):
+            contractor_info, job_date, job_type, address = parse_work_order_page(wo_html)
+
+    except httpx.HTTPError as e:
+        raise HttpFallback(f"HTTP error: {e}") from e
+
+    return {
+        "company": contractor_info,
+        "date": job_date,
+        "time": job.get("time"),
+        "name": job.get("name"),
+        "cid": cid,
+        "type": job_type,
+        "address": address,
+        "wo": wo_number
+    }
+
+async def fetch_job(job, get_page, http_client=None, wo_cache=None, timer=None, on_fallback=None):
+    """
+    One attempt at a job's details: over HTTP when a client is given (falling
+    back to the browser page from get_page), else in the browser. A failure
+    is recorded on the job (error/failure/retry_after) and returns None.
+    timer (a StageTimer) collects the stages of whichever path ran.
+    """
+    for key in ("error", "failure", "retry_after"):
+        job.pop(key, None)
+    try:
+        if http_client is not None:
+            try:
+                return await fetch_job_details(http_client, job, log=print, wo_cache=wo_cache, timer=timer)
+            except HttpFallback as e:
+                print(f"[{job.get('cid')}] HTTP fast path unavailable ({e}); using browser")
+                if on_fallback:
+                    on_fallback()
+        return await process_job_entries(await get_page(), job, log=print, wo_cache=wo_cache, timer=timer)
+    except Exception as e:
+        job["error"] = f"Failed: {e}"
+        job["failure"] = classify_failure(e)
+        job["retry_after"] = getattr(e, "retry_after", None)
+        return None
@@ -0,0 +1,81 @@
+# instrumentation.py
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from throttle import percentile
+
+# Report order; stages a run never hit are left out
+STAGES = [
+    "cached_wo_page",   # WO cache hit: load the cached WO page and check it
+    "customer_page",    # browser: customer page navigation
+    "overlays",         # browser: first-time overlay clearing
+    "main_view",        # browser: waiting for the MainView iframe
+    "wo_lookup",        # browser: reading the Work Orders table
+    "wo_page",          # browser: WO page navigation
+    "job_type",         # browser: job type + address
+    "contractor",       # browser: contractor assignments
+    "date",             # browser: date extraction (includes date_wait)
+    "date_wait",        # browser: waiting for #scheduledEventList to fill in
+    "http_wo_lookup",   # HTTP: customer page + Work Orders table
+    "http_wo_page",     # HTTP: WO page
+    "http_parse",       # HTTP: parsing the WO page
+    "job",              # one whole attempt at a job, as seen by the worker
+]
+
+class StageTimer:
+    """Durations of the stages of one job attempt; stages can repeat and add up."""
+    def __init__(self):
+        self.durations = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] += time.perf_counter() - t0
+
+    def add(self, name, seconds):
+        self.durations[name] += seconds
+
+class RunTimings:
+    """Per-stage samples for every job attempt of a run, reported as percentiles."""
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def record(self, timer, job_seconds=None):
+        for name, seconds in timer.durations.items():
+            self.samples[name].append(seconds)
+        if job_seconds is not None:
+            self.samples["job"].append(job_seconds)
+
+    def merge(self, other):
+        """Fold in the samples of another RunTimings, e.g. from a shard process."""
+        for name, values in other.samples.items():
+            self.samples[name].extend(values)
+
+    def summary(self, name):
+        """One-line avg/max for a stage, or 'n/a' if it never ran."""
+        values = self.samples.get(name)
+        if not values:
+            return "n/a"
+        return f"avg {sum(values) / len(values):.2f}s, max {max(values):.2f}s over {len(values)} jobs"
+
+    def report(self):
+        names = [n for n in STAGES if self.samples.get(n)]
+        names += sorted(n for n in self.samples if n not in STAGES and self.samples[n])
+        if not names:
+            return "Stage Timings: no jobs timed\n"
+        lines = [
+            "Stage Timings (seconds):",
+            f"{'Stage':<16}{'n':>6}{'mean':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}",
+        ]
+        for name in names:
+            values = self.samples[name]
+            lines.append(
+                f"{name:<16}{len(values):>6}{sum(values) / len(values):>8.3f}"
+                f"{percentile(values, 50):>8.3f}{percentile(values, 95):>8.3f}"
+                f"{percentile(values, 99):>8.3f}{max(values):>8.3f}"
+            )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,126 @@
+# job_diff.py
+import os
+from collections import defaultdict
+
+from utils import company_sort_key, job_date
+
+# (job key, label) of the fields compared between runs
+DIFF_FIELDS = [
+    ("company", "contractor"),
+    ("date", "date"),
+    ("time", "time"),
+    ("type", "type"),
+    ("address", "address"),
+    ("name", "name"),
+    ("wo", "WO"),
+]
+
+# Companies that say nothing about the real contractor (Junk is the TXT noon bucket)
+UNASSIGNED = {None, "", "Junk", "Unknown"}
+
+def _norm(value):
+    return str(value).strip() if value is not None else ""
+
+def _wo(job):
+    wo = _norm(job.get("wo")).replace("WO ", "")
+    return wo if wo and wo != "Unknown" else None
+
+def _field_changes(old, new):
+    changes = []
+    for key, label in DIFF_FIELDS:
+        before, after = old.get(key), new.get(key)
+        if key == "company" and (before in UNASSIGNED or after in UNASSIGNED):
+            continue
+        if key == "date":
+            if job_date(old) == job_date(new):
+                continue
+        elif key == "wo":
+            if _wo(old) == _wo(new):
+                continue
+        elif _norm(before) == _norm(after):
+            continue
+        changes.append((label, before, after))
+    return changes
+
+def diff_jobs(old_jobs, new_jobs):
+    """
+    Pair two runs by WO number, then by CID for jobs whose WO changed, and
+    report field-level changes. Linear in the number of jobs. Returns a dict
+    with "added" and "removed" job lists, "changed" as (old, new, [(field,
+    before, after)]) tuples and the "unchanged" count.
+    """
+    old_by_wo = defaultdict(list)
+    loose_old = []
+    for job in old_jobs:
+        wo = _wo(job)
+        if wo:
+            old_by_wo[wo].append(job)
+        else:
+            loose_old.append(job)
+
+    pairs, unmatched_new = [], []
+    for job in new_jobs:
+        wo = _wo(job)
+        candidates = old_by_wo.get(wo) if wo else None
+        if candidates:
+            pairs.append((candidates.pop(0), job))
+        else:
+            unmatched_new.append(job)
+
+    # Whatever didn't pair by WO gets a second chance by CID (a reissued WO)
+    old_by_cid = defaultdict(list)
+    for job in loose_old + [j for jobs in old_by_wo.values() for j in jobs]:
+        old_by_cid[_norm(job.get("cid"))].append(job)
+    added = []
+    for job in unmatched_new:
+        candidates = old_by_cid.get(_norm(job.get("cid")))
+        if candidates:
+            pairs.append((candidates.pop(0), job))
+        else:
+            added.append(job)
+    removed = [j for jobs in old_by_cid.values() for j in jobs]
+
+    changed, unchanged = [], 0
+    for old, new in pairs:
+        changes = _field_changes(old, new)
+        if changes:
+            changed.append((old, new, changes))
+        else:
+            unchanged += 1
+    return {"added": added, "removed": removed, "changed": changed, "unchanged": unchanged}
+
+def summarize_diff(diff):
+    return (
+        f"{len(diff['added'])} new, {len(diff['removed'])} cancelled, "
+        f"{len(diff['changed'])} changed, {diff['unchanged']} unchanged"
+    )
+
+def _line(job):
+    return f"{job.get('date')} {job.get('time')} - {job.get('name')} - {job.get('cid')} - {job.get('type')} - {job.get('address')} - WO {job.get('wo')}"
+
+def write_changes(diff, path, title=None):
+    """Change report grouped by contractor (the new one for changed jobs)."""
+    by_company = defaultdict(lambda: {"added": [], "removed": [], "changed": []})
+    for job in diff["added"]:
+        by_company[job.get("company") or "Unknown"]["added"].append(_line(job))
+    for job in diff["removed"]:
+        by_company[job.get("company") or "Unknown"]["removed"].append(_line(job))
+    for old, new, changes in diff["changed"]:
+        detail = "; ".join(f"{label} {before} → {after}" for label, before, after in changes)
+        by_company[new.get("company") or "Unknown"]["changed"].append(f"{_line(new)}: {detail}")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        if title:
+            f.write(f"{title}\n")
+        f.write(f"{summarize_diff(diff)}\n\n")
+        for company in sorted(by_company, key=company_sort_key):
+            sections = by_company[company]
+            f.write(f"{company}\n")
+            for key, heading in (("changed", "Changed"), ("added", "New"), ("removed", "Cancelled")):
+                if sections[key]:
+                    f.write(f"{heading}:\n")
+                    for line in sorted(sections[key]):
+                        f.write(f"  {line}\n")
+            f.write("\n")
+    return path
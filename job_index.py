@@ -0,0 +1,168 @@
+# job_index.py
+import os
+import bisect
+from collections import defaultdict
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from utils import get_sort_key, parse_date, company_sort_key
+
+PARTIAL_SUFFIX = ".partial.txt"
+
+# (font, fill) for the Excel header rows
+EXCEL_HEADER_STYLES = {
+    "company": (Font(bold=True, size=12, color="FFFFFF"), PatternFill("solid", fgColor="305496")),
+    "date": (Font(bold=True), PatternFill("solid", fgColor="D9E1F2")),
+}
+
+def entry_sort_key(job):
+    """Order within one company and day: time slot, then name."""
+    return (get_sort_key(job["time"]), job["name"].lower())
+
+def txt_company(job):
+    # The TXT export puts noon jobs in the Junk bucket
+    return "Junk" if job.get("time") == "12:00" else job.get("company")
+
+def job_line(job):
+    return (
+        f"{job['time']} - {job['name']} - {job['cid']} - "
+        f"{job['type']} - {job['address']} - WO {job['wo']}"
+    )
+
+class JobIndex:
+    """
+    Results grouped by company and date, each day kept sorted as jobs are
+    added, so an export is a single walk instead of a regroup-and-sort.
+    """
+    def __init__(self, jobs=(), company_of=None):
+        self.company_of = company_of or (lambda job: job.get("company"))
+        self.days = defaultdict(lambda: defaultdict(list))
+        self.count = 0
+        for job in jobs:
+            self.add(job)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, job):
+        bisect.insort(self.days[self.company_of(job)][job["date"]], job, key=entry_sort_key)
+        self.count += 1
+
+    def groups(self):
+        """(company, date, sorted jobs) in export order."""
+        for company in sorted(self.days, key=company_sort_key):
+            days = self.days[company]
+            for date in sorted(days, key=parse_date):
+                yield company, date, days[date]
+
+def write_txt(index, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        company = None
+        for co, date, entries in index.groups():
+            if co != company:
+                if company is not None:
+                    f.write("\n")
+                f.write(f"{co}\n\n")
+                company = co
+            f.write(f"{date}\n")
+            for job in entries:
+                f.write(job_line(job) + "\n")
+            f.write("\n")
+        if company is not None:
+            f.write("\n")
+
+def write_excel(index, path):
+    """
+    One streamed pass with openpyxl's write-only workbook. Column widths are
+    worked out from the rows in memory, since write-only sheets need them
+    before the first row goes out.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rows = []
+    widths = defaultdict(int)
+
+    def add_row(values, style=None):
+        rows.append((values, style))
+        for col, value in enumerate(values, start=1):
+            widths[col] = max(widths[col], len(str(value)))
+
+    company = None
+    for co, date, entries in index.groups():
+        if co != company:
+            if company is not None:
+                add_row([])
+            add_row([co], "company")
+            company = co
+        add_row([date], "date")
+        for job in entries:
+            add_row([job['time'], job['name'], job['cid'], job['type'], job['address'], f"WO {job['wo']}"])
+        add_row([])
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for col, width in widths.items():
+        ws.column_dimensions[get_column_letter(col)].width = width + 2
+    for values, style in rows:
+        if style:
+            cell = WriteOnlyCell(ws, value=values[0])
+            cell.font, cell.fill = EXCEL_HEADER_STYLES[style]
+            values = [cell]
+        ws.append(values)
+    wb.save(path)
+
+class LiveExport:
+    """
+    Streaming export for one run. Each result is added to the sorted indexes
+    and appended to Jobs<tag>.partial.txt right away; that file is in the TXT
+    format, so it can be opened (or imported) mid-run. finish() writes the
+    final TXT/XLSX from the indexes and removes the partial file.
+    """
+    def __init__(self, txt_path, excel_path=None):
+        self.txt_path = txt_path
+        self.excel_path = excel_path
+        self.partial_path = os.path.splitext(txt_path)[0] + PARTIAL_SUFFIX
+        self.txt_index = JobIndex(company_of=txt_company)
+        self.excel_index = JobIndex() if excel_path else None
+        os.makedirs(os.path.dirname(txt_path) or ".", exist_ok=True)
+        self._partial = open(self.partial_path, "w", encoding="utf-8")
+        self._last = (None, None)
+
+    def __len__(self):
+        return len(self.txt_index)
+
+    def add(self, job):
+        self.txt_index.add(job)
+        if self.excel_index is not None:
+            self.excel_index.add(job)
+
+        # Arrival order; headers are repeated whenever company or date changes
+        company, date = txt_company(job), job["date"]
+        if company != self._last[0]:
+            self._partial.write(f"\n{company}\n\n{date}\n")
+        elif date != self._last[1]:
+            self._partial.write(f"\n{date}\n")
+        self._partial.write(job_line(job) + "\n")
+        self._partial.flush()
+        self._last = (company, date)
+
+    def close(self):
+        if not self._partial.closed:
+            self._partial.close()
+
+    def finish(self):
+        """Write the final files; returns their paths."""
+        self.close()
+        write_txt(self.txt_index, self.txt_path)
+        files = [self.txt_path]
+        if self.excel_index is not None:
+            write_excel(self.excel_index, self.excel_path)
+            files.append(self.excel_path)
+        try:
+            os.remove(self.partial_path)
+        except OSError:
+            pass
+        return files
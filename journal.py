@@ -0,0 +1,92 @@
+# journal.py
+import os
+import json
+import glob
+import time
+
+from utils import OUTPUT_DIR
+
+JOURNAL_DIR = os.path.join(OUTPUT_DIR, "Journals")
+
+def job_key(job):
+    """Identity of a calendar entry; one CID can hold more than one slot."""
+    return f"{job.get('cid')}|{job.get('date') or ''}|{job.get('time')}"
+
+class RunJournal:
+    """
+    Append-only JSONL checkpoint of one scrape run. Every settled job is
+    flushed to disk as it finishes, so a crashed run can be resumed.
+    Lines: {"event": "start", ...meta, "jobs": [...]}, {"event": "done", ...},
+    {"event": "failed", ...}, and finally {"event": "complete"}.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "a", encoding="utf-8")
+
+    @classmethod
+    def create(cls, meta, jobs, directory=JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        journal = cls(os.path.join(directory, f"Run_{stamp}.jsonl"))
+        journal._write({"event": "start", **meta, "jobs": jobs})
+        return journal
+
+    def record(self, job, result):
+        if result:
+            self._write({"event": "done", "key": job_key(job), "result": result})
+        else:
+            self._write({"event": "failed", "key": job_key(job), "job": job})
+
+    def complete(self):
+        self._write({"event": "complete"})
+        self.close()
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+    def _write(self, entry):
+        self._f.write(json.dumps(entry, default=str) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+def load_journal(path):
+    """
+    Read a journal back. Returns (meta, jobs, results, failed, completed);
+    a torn last line from a crash is ignored.
+    """
+    meta, jobs, results, failed, completed = {}, [], {}, {}, False
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            event = entry.pop("event", None)
+            if event == "start":
+                jobs = entry.pop("jobs", [])
+                meta = entry
+            elif event == "done":
+                results[entry["key"]] = entry["result"]
+                failed.pop(entry["key"], None)
+            elif event == "failed":
+                failed[entry["key"]] = entry["job"]
+            elif event == "complete":
+                completed = True
+    return meta, jobs, results, failed, completed
+
+def _is_complete(path):
+    # The complete line is always last, so only the tail needs reading
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 256))
+        tail = f.read().decode("utf-8", "ignore")
+    return '"event": "complete"' in tail
+
+def find_resumable(directory=JOURNAL_DIR):
+    """The newest journal, if it never reached its complete line; otherwise None."""
+    paths = glob.glob(os.path.join(directory, "Run_*.jsonl"))
+    if not paths:
+        return None
+    newest = max(paths, key=os.path.getmtime)
+    return None if _is_complete(newest) else newest
@@ -1,13 +1,15 @@
 # main.py
 import traceback
-from tkinterdnd2 import TkinterDnD
-from gui import CalendarBuddyGUI
 import sys
+import multiprocessing
 import argparse
 from utils import ensure_playwright, BROWSERS, __version__, check_for_update
+from cli import add_scrape_arguments, run_cli
 import os
 
 if __name__ == "__main__":
+    # Sharded scrapes spawn worker processes; frozen builds must let them boot
+    multiprocessing.freeze_support()
     try:
         parser = argparse.ArgumentParser()
         parser.add_argument(
@@ -20,6 +22,12 @@ if __name__ == "__main__":
             action='store_true',
             help="Print current version and exit"
         )
+        subparsers = parser.add_subparsers(dest="command")
+        scrape_parser = subparsers.add_parser(
+            "scrape",
+            help="Run a scrape headless (no Tk) and print JSON progress lines"
+        )
+        add_scrape_arguments(scrape_parser)
         args, remaining = parser.parse_known_args()
 
         if args.version:
@@ -31,12 +39,21 @@ if __name__ == "__main__":
             sys.exit(0)
             
         os.environ["PLAYWRIGHT_BROWSERS_PATH"] = BROWSERS
-        print(f"PLAYWRIGHT_BROWSERS_PATH set to {BROWSERS}")
+        print(f"PLAYWRIGHT_BROWSERS_PATH set to {BROWSERS}", file=sys.stderr if args.command == "scrape" else sys.stdout)
+
+        if args.command == "scrape":
+            sys.exit(run_cli(args))
+
+        # Tk is only needed for the desktop app
+        from tkinterdnd2 import TkinterDnD
+        from gui import CalendarBuddyGUI
         ensure_playwright()
         root = TkinterDnD.Tk()
         gui = CalendarBuddyGUI(root)
         root.mainloop()
 
     except Exception as e:
-        print(f"❌ Unhandled crash: {e}")
+        # stderr keeps a scrape's JSON stdout clean; non-zero so cron sees the failure
+        print(f"❌ Unhandled crash: {e}", file=sys.stderr)
         traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,39 @@
+# retry.py
+import random
+import asyncio
+
+import httpx
+from playwright.async_api import Error as PlaywrightError
+
+from utils import NoWOError, NoOpenWOError
+
+# Failure kinds recorded on job["failure"]
+TRANSIENT = "transient"        # navigation/timeout/network hiccup, worth retrying
+RATE_LIMITED = "rate_limited"  # the intranet pushed back (429/403/503)
+PERMANENT = "permanent"        # NoWOError/NoOpenWOError or a parse bug; retrying won't help
+
+MAX_ATTEMPTS = 3       # tries in the main pass before a job is deferred
+FINAL_PASS_WORKERS = 2  # concurrency of the last pass over deferred jobs
+
+class RateLimitedError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"Rate limited (HTTP {status})")
+        self.status = status
+        self.retry_after = retry_after
+
+def classify_failure(exc):
+    if isinstance(exc, (NoWOError, NoOpenWOError)):
+        return PERMANENT
+    if isinstance(exc, RateLimitedError):
+        return RATE_LIMITED
+    # Playwright's TimeoutError is a PlaywrightError too
+    if isinstance(exc, (PlaywrightError, asyncio.TimeoutError, httpx.TransportError, OSError)):
+        return TRANSIENT
+    return PERMANENT
+
+def backoff_delay(attempt, base=1.0, cap=30.0, retry_after=None):
+    """Exponential backoff with full jitter; never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
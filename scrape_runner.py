@@ -2,122 +2,505 @@ import os
 import time
 import socket
 import asyncio
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from math import ceil
 
-from scraper_core import scrape_jobs, init_playwright_page, process_job_entries
-from utils import export_txt, export_excel, generate_changes_file, handle_login, OUTPUT_DIR, PROJECT_ROOT
+from scraper_core import scrape_jobs, scrape_date_range, init_playwright_page, RouteStats, har_archives
+from http_scraper import create_http_client, fetch_job, load_state_cookies
+from utils import plan_incremental, job_in_range, LoginSession, is_login_page, OUTPUT_DIR, PROJECT_ROOT
 from emailer import send_job_results
+from throttle import AdaptiveLimiter, RATE_LIMIT_CODES, percentile
+from wo_cache import WOCache
+from journal import RunJournal, load_journal, find_resumable, job_key
+from job_index import LiveExport
+from job_diff import diff_jobs, summarize_diff, write_changes
+from shard import run_sharded
+from instrumentation import StageTimer, RunTimings
+from retry import (
+    backoff_delay, MAX_ATTEMPTS, FINAL_PASS_WORKERS,
+    TRANSIENT, RATE_LIMITED, PERMANENT
+)
 from spreader import run_process as run_spreader
 
-INTERESTING_CODES = [429, 403, 503]
+INTERESTING_CODES = RATE_LIMIT_CODES
 
-def handle_exports(app, results, txt_filename, excel_filename, unparsed_jobs=None, stats=None):
-    files = []
-
-    # 1) TXT export
-    export_txt(results, filename=txt_filename)
-    files.append(txt_filename)
-
-    # 2) Excel export, if checked
-    if app.export_excel.get():
-        export_excel(results, filename=excel_filename)
-        files.append(excel_filename)
+def handle_exports(options, live, unparsed_jobs=None, stats=None, date_range=None):
+    # 1) + 2) TXT and (if checked) Excel, straight from the run's sorted index
+    files = live.finish()
     
     # 3) Add any extra attachments
     if unparsed_jobs:
         files.extend(unparsed_jobs)
 
     # 3) Email, if checked
-    if app.send_email.get():
-        date_range = app.base_date.get()
-        send_job_results(files, date_range, stats)
+    if options.send_email:
+        send_job_results(files, date_range or options.selected_day, stats)
+    return files
+
+def summarize_worker_balance(worker_stats):
+    """One-line spread of jobs and busy time across workers, e.g. for the stats block."""
+    if not worker_stats:
+        return "n/a"
+    jobs = [w["jobs"] for w in worker_stats]
+    busy = [w["busy"] for w in worker_stats]
+    return (
+        f"{min(jobs)}-{max(jobs)} jobs/worker, "
+        f"busy {min(busy):.1f}s-{max(busy):.1f}s"
+    )
+
+class ScrapeOptions:
+    """Settings for one scrape run; the GUI and the CLI both build one of these."""
+    def __init__(self, mode="week", selected_day=None, workers=6, http_mode=False,
+                 adaptive=False, use_wo_cache=True, incremental=False, block_profile="lean",
+                 test_mode=False, test_limit=10, export_excel=False, send_email=False,
+                 run_spreader=False, imported_jobs=None, resume=False, shards=1,
+                 output_dir=None, har_mode=None, har_dir=None, end_day=None):
+        self.mode = mode  # "day", "week" or "range" (selected_day through end_day)
+        self.selected_day = selected_day or datetime.now().strftime("%m/%d/%y")
+        self.end_day = end_day
+        self.workers = max(1, workers)
+        self.http_mode = http_mode
+        self.adaptive = adaptive
+        self.use_wo_cache = use_wo_cache
+        self.incremental = incremental
+        self.block_profile = block_profile
+        self.test_mode = test_mode
+        self.test_limit = test_limit
+        self.export_excel = export_excel
+        self.send_email = send_email
+        self.run_spreader = run_spreader
+        self.imported_jobs = imported_jobs
+        self.resume = resume
+        self.shards = max(1, shards)
+        self.har_mode = har_mode  # None, "record" or "replay" (see scraper_core.HAR_MODES)
+        self.har_dir = har_dir
+        if output_dir is None and har_mode == "replay":
+            # Replayed outputs stay with the recording instead of replacing real ones
+            output_dir = os.path.join(har_dir, "Replay")
+        self.output_dir = output_dir or OUTPUT_DIR
+
+class ScrapeReporter:
+    """Where a run reports to. The base class only prints log lines."""
+    def log(self, msg):
+        print(msg)
+
+    def error(self, msg):
+        """A run that stops before scraping; shown as a log line unless overridden."""
+        self.log(f"❌ {msg}")
+
+    def start(self, total):
+        pass
+
+    def job_started(self):
+        pass
+
+    def job_finished(self, done, total, job, result):
+        pass
+
+    def spread_ready(self, spread_file):
+        pass
+
+class AppReporter(ScrapeReporter):
+    """Drives the GUI's log, progress bar and throughput label."""
+    def __init__(self, app):
+        self.app = app
+
+    def log(self, msg):
+        self.app.log(msg)
+
+    def start(self, total):
+        app = self.app
+        app.jobs_done = 0
+        app.start_time = None
+        app.scrape_total = total
+        app.progress_var.set(0)
+        app.progress_bar["maximum"] = total
+        app.counter_label.config(text=f"0 of {total} completed (0%)")
+
+    def job_started(self):
+        if self.app.start_time is None:
+            self.app.start_time = time.perf_counter()
+
+    def job_finished(self, done, total, job, result):
+        app = self.app
+        app.progress_var.set(done)
+        percent = (done / total) * 100
+        app.counter_label.config(text=f"{done} of {total} completed ({percent:.0f}%)")
+        app.jobs_done += 1
+        app.root.after(0, app.update_throughput)
+
+    def spread_ready(self, spread_file):
+        if getattr(self.app, "show_approve_spread_popup", None):
+            self.app.show_approve_spread_popup(spread_file)
+
+def options_from_app(app):
+    def flag(name, default=False):
+        var = getattr(app, name, None)
+        return bool(var.get()) if var is not None else default
+
+    return ScrapeOptions(
+        mode=app.scrape_mode_choice.get(),
+        selected_day=app.base_date.get(),
+        workers=app.worker_count.get(),
+        http_mode=flag("http_mode"),
+        adaptive=flag("adaptive_workers"),
+        use_wo_cache=flag("use_wo_cache"),
+        incremental=flag("incremental"),
+        block_profile=app.block_profile.get() if getattr(app, "block_profile", None) else "images",
+        test_mode=app.test_mode.get(),
+        test_limit=app.test_limit.get(),
+        export_excel=app.export_excel.get(),
+        send_email=app.send_email.get(),
+        run_spreader=flag("run_spreader"),
+        imported_jobs=app.imported_jobs,
+        resume=getattr(app, "resume_requested", False),
+        shards=app.shard_count.get() if getattr(app, "shard_count", None) else 1,
+        end_day=app.end_date.get() if getattr(app, "end_date", None) else None,
+    )
 
 async def run_scrape(app):
-    is_update = bool(app.imported_jobs)
-    app.log("🚀 Starting full scrape...")
+    """GUI entry point: snapshot the Tk settings and run with live widgets."""
+    options = options_from_app(app)
+    app.resume_requested = False
+    return await run_scrape_job(options, AppReporter(app), service=getattr(app, "browser_service", None))
+
+async def run_scrape_job(options, reporter=None, service=None):
+    """
+    Tk-free scrape engine. Returns a summary dict (counts, output files, stats),
+    or None if login failed. With a BrowserService (run on its loop) the warm
+    browser and contexts are borrowed instead of launching a fresh Chromium.
+    """
+    reporter = reporter or ScrapeReporter()
+    is_update = bool(options.imported_jobs)
+    reporter.log("🚀 Starting full scrape...")
     t0 = time.time()
 
-    selected_day = app.base_date.get()
-    mode = app.scrape_mode_choice.get()
-    send_email = app.send_email.get()
-
-    playwright, browser, context, page = await init_playwright_page(headless=True)
+    selected_day = options.selected_day
+    end_day = options.end_day
+    mode = options.mode
+
+    # Resume picks up the newest unfinished journal instead of re-reading the calendar
+    journal_dir = os.path.join(options.output_dir, "Journals")
+    resume_path = None
+    if options.resume:
+        resume_path = find_resumable(journal_dir)
+        if resume_path:
+            resume_meta, journal_jobs, journal_done, journal_failed, _ = load_journal(resume_path)
+            mode = resume_meta.get("mode", mode)
+            selected_day = resume_meta.get("selected_day", selected_day)
+            end_day = resume_meta.get("end_day", end_day)
+            reporter.log(f"⏯️ Resuming {os.path.basename(resume_path)}: {len(journal_done)} of {len(journal_jobs)} jobs already done.")
+        else:
+            reporter.log("ℹ️ No unfinished run to resume; starting a fresh scrape.")
+
+    if mode == "range":
+        try:
+            range_start = datetime.strptime(selected_day, "%m/%d/%y").date()
+            range_end = datetime.strptime(end_day or "", "%m/%d/%y").date()
+        except ValueError:
+            reporter.error(f"Date range needs a start and end date (MM/DD/YY), got {selected_day!r} to {end_day!r}.")
+            return None
+        if range_end < range_start:
+            reporter.error(f"Date range ends ({end_day}) before it starts ({selected_day}).")
+            return None
+
+    http_mode = options.http_mode
+    use_wo_cache = options.use_wo_cache
+    har_mode, har_dir = options.har_mode, options.har_dir
+    if har_mode:
+        recorded = har_archives(har_dir)
+        if har_mode == "record" and recorded:
+            reporter.error(f"{har_dir} already holds a recording; record into an empty directory.")
+            return None
+        if har_mode == "replay" and not recorded:
+            reporter.error(f"No HAR recording found in {har_dir}.")
+            return None
+        # Only browser traffic is archived, and a cache hit would skip pages the
+        # other run fetched, so both sides of a recording use the plain browser path
+        http_mode = use_wo_cache = False
+        service = None
+        reporter.log(f"📼 HAR {har_mode}: {har_dir} (HTTP mode and WO cache off)")
+        if har_mode == "record":
+            reporter.log("⚠️ The recording holds session cookies and the login form; keep it private.")
+    num_threads = options.workers
+    sharded = options.shards > 1
+    if sharded and options.adaptive:
+        reporter.log("⚠️ Adaptive workers are per-process; sharded runs use a fixed count.")
+    # With adaptive workers the worker count is the ceiling, not a fixed count
+    limiter = AdaptiveLimiter(max_limit=num_threads, log=reporter.log) if options.adaptive and not sharded else None
+    block_profile = options.block_profile
+    route_stats = RouteStats()
+    wo_cache = WOCache() if use_wo_cache else None
+
+    if service is None:
+        playwright, browser, context, page = await init_playwright_page(
+            headless=True, block_profile=block_profile, route_stats=route_stats,
+            har_mode=har_mode, har_dir=har_dir
+        )
+        session = LoginSession(log=reporter.log)
 
-    # 2) explicitly perform login, with its own logging
-    app.log("🔐 Attempting to log in…")
+    # 2) explicitly perform login, with its own logging. This is the only
+    # login of the run; worker contexts are seeded from the captured state.
+    reporter.log("🔐 Attempting to log in…")
     try:
-        await handle_login(page, app.log)
-        app.log("✅ Login successful.")
+        if service is None:
+            await session.ensure(page)
+        else:
+            # The GUI's warm browser: already launched and normally already logged in
+            await service.start(block_profile)
+            playwright, browser, session = service.playwright, service.browser, service.session
+            context, page = await service.lease(block_profile, route_stats)
+        reporter.log("✅ Login successful.")
     except Exception as e:
-        app.log(f"❌ Login failed: {e}")
-        browser.close()
-        playwright.stop()
-        return
+        reporter.error(f"Login failed: {e}")
+        if service is None:
+            await browser.close()
+            await playwright.stop()
+        return None
+
+    async def open_context():
+        if service is not None:
+            return await service.lease(block_profile, route_stats)
+        return await init_playwright_page(
+            browser=browser, playwright=playwright, storage_state=session.state,
+            block_profile=block_profile, route_stats=route_stats,
+            har_mode=har_mode, har_dir=har_dir
+        )
+
+    async def close_context(context, page):
+        if service is not None:
+            await service.release(context, page)
+        else:
+            await page.close()
+            await context.close()
 
     tA = time.time()
-    raw_jobs = await scrape_jobs(
-        page=page,
-        mode=mode,
-        imported_jobs=None,
-        selected_day=selected_day,
-        test_mode=app.test_mode.get(),
-        test_limit=app.test_limit.get(),
-        log=app.log
-    )
-    await page.close()
-    await context.close()
+    results = []
+    incomplete = []
+    if resume_path:
+        # Done jobs and known dead ends come straight from the journal
+        results = list(journal_done.values())
+        incomplete = [j for j in journal_failed.values() if j.get("failure") == PERMANENT]
+        settled = set(journal_done) | {job_key(j) for j in incomplete}
+        raw_jobs = [j for j in journal_jobs if job_key(j) not in settled]
+        journal = RunJournal(resume_path)
+    elif mode == "range":
+        # One calendar page per week, loaded side by side, feeding one detail pass
+        raw_jobs = await scrape_date_range(
+            open_context, close_context, range_start, range_end,
+            test_mode=options.test_mode, test_limit=options.test_limit, log=reporter.log
+        )
+    else:
+        raw_jobs = await scrape_jobs(
+            page=page,
+            mode=mode,
+            imported_jobs=None,
+            selected_day=selected_day,
+            test_mode=options.test_mode,
+            test_limit=options.test_limit,
+            log=reporter.log
+        )
+    # Reuse the logged-in cookies for plain HTTP fetches
+    http_client = create_http_client(
+        session.state,
+        max_connections=num_threads,
+        on_status=limiter.on_status if limiter else None
+    ) if http_mode and not sharded else None
+    await close_context(context, page)
     tB = time.time()
     print(f"Metadata Scrape took {tB-tA:.2f}s")
 
+    incremental = options.incremental
+    if incremental and is_update and not resume_path:
+        # Only new, moved or stale calendar entries need their detail pages
+        calendar_count = len(raw_jobs)
+        raw_jobs, results = plan_incremental(raw_jobs, options.imported_jobs)
+        reporter.log(f"♻️ Incremental: reusing {len(results)} of {calendar_count} jobs, fetching {len(raw_jobs)}.")
+    elif incremental and not resume_path:
+        reporter.log("⚠️ Incremental mode needs an imported job file; scraping everything.")
+    reused_count = 0 if resume_path else len(results)
+
+    output_dir = options.output_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    if mode == "day":
+        base_date = datetime.strptime(selected_day, "%m/%d/%y")
+        date_str = base_date.strftime("%m%d")
+        txt_filename = os.path.join(output_dir, f"Jobs{date_str}.txt")
+        excel_filename = os.path.join(output_dir, f"Jobs{date_str}.xlsx")
+        start_date = end_date = base_date
+    elif mode == "range":
+        start_date = datetime.combine(range_start, datetime.min.time())
+        end_date = datetime.combine(range_end, datetime.min.time())
+        range_str = f"{start_date.strftime('%m%d')}-{end_date.strftime('%m%d')}"
+        txt_filename = os.path.join(output_dir, f"Jobs{range_str}.txt")
+        excel_filename = os.path.join(output_dir, f"Jobs{range_str}.xlsx")
+    else:
+        base_date = datetime.strptime(selected_day, "%m/%d/%y")
+        sunday = base_date - timedelta(days=(base_date.weekday() + 1) % 7)
+        saturday = sunday + timedelta(days=6)
+        range_str = f"{sunday.strftime('%m%d')}-{saturday.strftime('%m%d')}"
+        txt_filename = os.path.join(output_dir, f"Jobs{range_str}.txt")
+        excel_filename = os.path.join(output_dir, f"Jobs{range_str}.xlsx")
+        start_date = sunday
+        end_date = saturday
+
+    output_tag = start_date.strftime("%m%d") if start_date == end_date else f"{start_date.strftime('%m%d')}-{end_date.strftime('%m%d')}"
+    date_label = f"{selected_day} - {end_day}" if mode == "range" else selected_day
+
+    if not resume_path:
+        # Checkpoint every settled job so a crash can resume from here
+        journal = RunJournal.create({"mode": mode, "selected_day": selected_day, "end_day": end_day}, raw_jobs, directory=journal_dir)
+        for result in results:
+            journal.record(result, result)
+
+    # Results stream into a sorted index and a partial TXT as they land
+    live = LiveExport(txt_filename, excel_filename if options.export_excel else None)
+    for result in results:
+        live.add(result)
+    reporter.log(f"📝 Live results: {os.path.relpath(live.partial_path, PROJECT_ROOT)}")
+
     total_jobs = len(raw_jobs)
-    app.jobs_done   = 0
-    app.start_time  = None
-    app.scrape_total = total_jobs
-    results = []
-    incomplete = []
     completed = [0]
-    app.progress_var.set(0)
-    app.progress_bar["maximum"] = total_jobs
-    app.counter_label.config(text=f"0 of {total_jobs} completed (0%)")
+    http_fallbacks = [0]
+    reporter.start(total_jobs)
     lock = asyncio.Lock()
 
-    async def worker(job_batch, idx):
-        worker_context, worker_page = await init_playwright_page(browser=browser, playwright=playwright)
-        worker_page.on("response", log_response)
-        await handle_login(worker_page)
-        try:
-            for job in job_batch:
-                if app.start_time is None:
-                    app.start_time = time.perf_counter()
+    worker_stats = []
+    timings = RunTimings()
+    deferred = []  # transient failures that ran out of main-pass attempts
+    retried = [0]
+    loop = asyncio.get_running_loop()
 
-                try:
-                    result = await process_job_entries(worker_page, job, log=print)
-                except Exception as e:
-                    job.setdefault("error", f"Failed: {e}")
-                    result = None
-
-                async with lock:
-                    completed[0] += 1
-                    app.progress_var.set(completed[0])
-                    percent = (completed[0] / total_jobs) * 100
-                    app.counter_label.config(text=f"{completed[0]} of {total_jobs} completed ({percent:.0f}%)")
-                    app.jobs_done += 1
-                    app.root.after(0, app.update_throughput)
-
-                    if result:
-                        results.append(result)
-                    else:
-                        job.setdefault("error", "Failed to parse job details")
-                        incomplete.append(job)
-
-                        app.log(f"Failed to parse {job.get('cid')}")
-        finally:
-            await worker_page.close()
-            await worker_context.close()
+    async def finish_job(job, result):
+        async with lock:
+            completed[0] += 1
+            reporter.job_finished(completed[0], total_jobs, job, result)
+
+            if result:
+                results.append(result)
+                live.add(result)
+            else:
+                job.setdefault("error", "Failed to parse job details")
+                incomplete.append(job)
+
+                reporter.log(f"Failed to parse {job.get('cid')}")
+            journal.record(job, result)
+
+    def count_fallback():
+        http_fallbacks[0] += 1
+
+    async def worker(idx, job_queue, settle, allow_retry):
+        worker_context = worker_page = None
+        seeded_state = None
+        stats = {"worker": idx, "jobs": 0, "busy": 0.0}
+        worker_stats.append(stats)
+
+        async def get_worker_page():
+            # Browser contexts are only opened when a job actually needs one
+            nonlocal worker_context, worker_page, seeded_state
+            if worker_page is None:
+                seeded_state = session.state
+                worker_context, worker_page = await open_context()
+                worker_page.on("response", log_response)
+            return worker_page
+
+        async def recover_session():
+            # Shared re-login, then reseed this worker's context from the new state
+            nonlocal worker_context, worker_page
+            new_state = await session.refresh(worker_page, seeded_state)
+            if http_client is not None:
+                http_client.cookies = load_state_cookies(new_state)
+            await close_context(worker_context, worker_page)
+            worker_context = worker_page = None
 
+        try:
+            if not http_mode and limiter is None:
+                await get_worker_page()
+            while True:
+                job = await job_queue.get()
+                if job is None:
+                    break
+
+                async with (limiter.slot() if limiter else nullcontext()):
+                    reporter.job_started()
+                    job_t0 = time.perf_counter()
+                    timer = StageTimer()
+                    result = await fetch_job(
+                        job, get_worker_page, http_client=http_client, wo_cache=wo_cache,
+                        timer=timer, on_fallback=count_fallback
+                    )
+                    job_elapsed = time.perf_counter() - job_t0
+                    timings.record(timer, job_elapsed)
+
+                    if result is None and worker_page is not None and is_login_page(worker_page) \
+                            and not job.get("relogin_retry"):
+                        # Session expired under us: log in once for everyone and redo this job
+                        job["relogin_retry"] = True
+                        await recover_session()
+                        job_queue.put_nowait(job)
+                        continue
+
+                    failure = job.get("failure", TRANSIENT) if result is None else None
+                    if limiter:
+                        # A "no WO" answer is a healthy response; only real failures count
+                        limiter.record(job_elapsed, ok=failure in (None, PERMANENT))
+
+                stats["jobs"] += 1
+                stats["busy"] += job_elapsed
+
+                if failure in (TRANSIENT, RATE_LIMITED) and allow_retry:
+                    job["attempts"] = job.get("attempts", 0) + 1
+                    if job["attempts"] < MAX_ATTEMPTS:
+                        # Back off and put it back for whichever worker is free then
+                        delay = backoff_delay(job["attempts"], retry_after=job.get("retry_after"))
+                        reporter.log(f"🔁 [{job.get('cid')}] {failure} failure ({job.get('error')}), retry {job['attempts']} in {delay:.1f}s")
+                        retried[0] += 1
+                        loop.call_later(delay, job_queue.put_nowait, job)
+                        continue
+                    deferred.append(job)
+                    settle()
+                    continue
+
+                await finish_job(job, result)
+                settle()
+        finally:
+            if worker_page is not None:
+                await close_context(worker_context, worker_page)
+
+    async def run_pool(jobs, n_workers, allow_retry, first_idx=0):
+        """Run jobs through n_workers sharing one queue; stops once every job is settled."""
+        if not jobs:
+            return
+        # Workers pull from one shared queue, so a slow job only holds up its own worker
+        job_queue = asyncio.Queue()
+        for job in jobs:
+            job_queue.put_nowait(job)
+        outstanding = [len(jobs)]
+
+        def settle():
+            # A job is settled once it won't be requeued; then wake idle workers to exit
+            outstanding[0] -= 1
+            if outstanding[0] == 0:
+                for _ in range(n_workers):
+                    job_queue.put_nowait(None)
+
+        tasks = [
+            asyncio.create_task(worker(first_idx + i, job_queue, settle, allow_retry))
+            for i in range(n_workers)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # One worker failing must not leave the others waiting on the queue
+            # forever; cancelling runs their cleanup, which hands contexts back
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
     def log_response(response):
+        if limiter:
+            limiter.on_status(response.status, response.headers)
         if response.status in INTERESTING_CODES:
             print(f"\n--- POSSIBLE RATE LIMIT ---")
             print(f"URL: {response.url}")
@@ -136,50 +519,67 @@ async def run_scrape(app):
             print(f"[{tag}] {url} status={status} elapsed={elapsed}ms")
         page.on("response", on_response)
 
-    num_threads = max(1, app.worker_count.get())
-    batch_size = max(1, ceil(len(raw_jobs) / num_threads))
-    batches = [raw_jobs[i:i + batch_size] for i in range(0, len(raw_jobs), batch_size)]
-
-    app.log("Processing Jobs...")
+    num_workers = min(num_threads, max(1, total_jobs))
 
-    await asyncio.gather(*(worker(batch, i) for i, batch in enumerate(batches)))
-
-    await browser.close()
-    await playwright.stop()
-
-    output_dir = OUTPUT_DIR
-    os.makedirs(output_dir, exist_ok=True)
-
-    if mode == "day":
-        base_date = datetime.strptime(selected_day, "%m/%d/%y")
-        date_str = base_date.strftime("%m%d")
-        txt_filename = os.path.join(output_dir, f"Jobs{date_str}.txt")
-        excel_filename = os.path.join(output_dir, f"Jobs{date_str}.xlsx")
-        start_date = end_date = base_date
-    else:
-        base_date = datetime.strptime(selected_day, "%m/%d/%y")
-        sunday = base_date - timedelta(days=(base_date.weekday() + 1) % 7)
-        saturday = sunday + timedelta(days=6)
-        range_str = f"{sunday.strftime('%m%d')}-{saturday.strftime('%m%d')}"
-        txt_filename = os.path.join(output_dir, f"Jobs{range_str}.txt")
-        excel_filename = os.path.join(output_dir, f"Jobs{range_str}.xlsx")
-        start_date = sunday
-        end_date = saturday
+    reporter.log("Processing Jobs...")
 
-    output_tag = start_date.strftime("%m%d") if start_date == end_date else f"{start_date.strftime('%m%d')}-{end_date.strftime('%m%d')}"
+    try:
+        if sharded:
+            # Each process gets its own Chromium; results come back through finish_job
+            reporter.job_started()
+            expired = []
+
+            async def finish_shard_job(job, result):
+                if result is None and job.pop("session_expired", False):
+                    # Shards don't log in; these are redone here after one re-login
+                    expired.append(job)
+                    return
+                await finish_job(job, result)
+
+            for summary in await run_sharded(raw_jobs, session.state, options, options.shards, finish_shard_job, log=reporter.log):
+                route_stats.merge(summary["route_stats"])
+                timings.merge(summary["timings"])
+                worker_stats.extend(summary["worker_stats"])
+                retried[0] += summary["retried"]
+                http_fallbacks[0] += summary["http_fallbacks"]
+            if expired:
+                # One re-login here, then the expired jobs get a full pool with retries;
+                # only what still fails ends up in the final pass
+                reporter.log(f"🔐 Session expired during the sharded run; redoing {len(expired)} jobs here")
+                stale_state = session.state
+                relogin_context, relogin_page = await open_context()
+                try:
+                    await session.refresh(relogin_page, stale_state)
+                finally:
+                    await close_context(relogin_context, relogin_page)
+                await run_pool(expired, min(num_workers, len(expired)), allow_retry=True)
+        else:
+            await run_pool(raw_jobs, num_workers, allow_retry=True)
+        if deferred:
+            # Last chance for flaky jobs, gently
+            reporter.log(f"🔁 Final pass over {len(deferred)} jobs that kept failing…")
+            final_jobs = list(deferred)
+            await run_pool(final_jobs, min(FINAL_PASS_WORKERS, len(final_jobs)), allow_retry=False, first_idx=num_workers)
+    finally:
+        journal.close()
+        live.close()
+        if http_client is not None:
+            await http_client.aclose()
+        if wo_cache is not None:
+            wo_cache.close()
+        if service is None:
+            await browser.close()
+            await playwright.stop()
 
     unparsed_file = None
     if incomplete:
         unparsed_file = os.path.join(output_dir, f"UnparsedJobs{output_tag}.txt")
-        with open(os.path.join(output_dir, f"UnparsedJobs{output_tag}.txt"), "w") as f:
+        with open(unparsed_file, "w") as f:
             for job in incomplete:
-                f.write(f"{job.get('time', '?')} - {job.get('name', '?')} - {job.get('cid', '?')} - REASON: {job.get('error', 'Unknown')}\n")
+                f.write(f"{job.get('time', '?')} - {job.get('name', '?')} - {job.get('cid', '?')} - REASON: {job.get('error', 'Unknown')} [{job.get('failure', 'unknown')}]\n")
 
     elapsed = time.time() - t0
     minutes, seconds = divmod(elapsed, 60)
-    num_threads = app.worker_count.get()
-    mode = app.scrape_mode_choice.get()
-    selected_day = app.base_date.get()
     total_jobs = len(results)
     failed_jobs = len(incomplete)
     avg_time = elapsed / total_jobs if total_jobs else 0
@@ -187,60 +587,94 @@ async def run_scrape(app):
     end_time_str = time.strftime("%Y-%m-%d %H:%M:%S")
 
     hostname = socket.gethostname()
+    if limiter:
+        concurrency = limiter.summary()
+    elif sharded:
+        concurrency = f"{options.shards} processes, {num_threads} workers total"
+    else:
+        concurrency = f"fixed {num_threads}"
+    cache_summary = wo_cache.summary() if wo_cache else "off"
+    balance = summarize_worker_balance(worker_stats)
+    http_summary = f"on ({http_fallbacks[0]} browser fallbacks)" if http_mode else "off"
 
     stats = (
         f"Stats for this run:\n"
         f"---------------------\n"
-        f"Scrape Mode:     {mode} ({selected_day})\n"
+        f"Scrape Mode:     {mode} ({date_label})\n"
         f"Threads Used:    {num_threads}\n"
+        f"Concurrency:     {concurrency}\n"
+        f"WO Cache:        {cache_summary}\n"
+        f"HTTP Mode:       {http_summary}\n"
+        f"Blocking:        {block_profile}: {route_stats.summary()}\n"
+        f"HAR:             {f'{har_mode} ({har_dir})' if har_mode else 'off'}\n"
         f"Total Jobs:      {total_jobs}\n"
+        f"Reused (incr.):  {reused_count}\n"
         f"Failed/Unparsed: {failed_jobs}\n"
+        f"Retries:         {retried[0]} ({len(deferred)} jobs to final pass)\n"
         f"Total Time:      {int(minutes)}m {int(seconds)}s\n"
         f"Avg Time/Job:    {avg_time:.2f} sec/job\n"
+        f"Worker Balance:  {balance}\n"
+        f"WO Date Wait:    {timings.summary('date_wait')}\n"
         f"Start Time:      {start_time_str}\n"
         f"End Time:        {end_time_str}\n"
         f"Host:            {hostname}\n"
+        f"\n"
+        f"{timings.report()}"
     )
 
-    handle_exports(app, results, txt_filename, excel_filename, [unparsed_file] if unparsed_file else None, stats)
+    # Per-stage percentiles next to the outputs, so slow stages can be compared run to run
+    report_file = os.path.join(output_dir, f"RunReport{output_tag}.txt")
+    with open(report_file, "w", encoding="utf-8") as f:
+        f.write(stats)
+
+    files = handle_exports(options, live, [unparsed_file] if unparsed_file else None, stats, date_range=date_label)
+    RunJournal(journal.path).complete()
 
     minutes, seconds = divmod(elapsed, 60)
-    app.log(f"Scrape complete. {len(results)} jobs saved.")
+    reporter.log(f"Scrape complete. {len(results)} jobs saved.")
     if unparsed_file:
         rel_unparsed = os.path.relpath(unparsed_file, PROJECT_ROOT)
-        app.log(f"{len(incomplete)} unparsed jobs saved to {rel_unparsed}")
+        reporter.log(f"{len(incomplete)} unparsed jobs saved to {rel_unparsed}")
+    reporter.log(f"⏱️ Stage timings saved to {os.path.relpath(report_file, PROJECT_ROOT)}")
 
     if is_update:
-        def same_day(job):
-            try:
-                # job["date"] is like "6-16-25"
-                dt = datetime.strptime(job["date"], "%m-%d-%y")
-                return dt.strftime("%m%d") == output_tag
-            except Exception:
-                return False
-
-        filtered_old = [j for j in app.imported_jobs if same_day(j)]
-
-        changes_filename = f"{output_tag}Changes.txt"
-        changes_path = generate_changes_file(
-            filtered_old,
-            results,
-            changes_filename
+        # Compare against the previous run's jobs in this run's whole date range
+        previous = [
+            j for j in options.imported_jobs if job_in_range(j, start_date.date(), end_date.date())
+        ]
+        diff = diff_jobs(previous, results)
+        changes_path = write_changes(
+            diff,
+            os.path.join(output_dir, f"{output_tag}Changes.txt"),
+            title=f"Changes for {date_label} vs. {len(previous)} previous jobs"
         )
-        app.log(f"✅ Change summary written to {os.path.relpath(changes_path)}")
+        reporter.log(f"🔀 Changes: {summarize_diff(diff)}")
+        reporter.log(f"✅ Change summary written to {os.path.relpath(changes_path, PROJECT_ROOT)}")
 
-    if getattr(app, "run_spreader", None) and app.run_spreader.get():
+    if options.run_spreader:
         try:
             spread_file = run_spreader(txt_filename)
             if os.path.exists(spread_file):
                 rel_path = os.path.relpath(spread_file, PROJECT_ROOT)
-                app.log(f"(Experimental) Recommended spread saved to {rel_path}")
-                if getattr(app, "show_approve_spread_popup", None):
-                    app.show_approve_spread_popup(spread_file)  # simplified check since already checked above
+                reporter.log(f"(Experimental) Recommended spread saved to {rel_path}")
+                reporter.spread_ready(spread_file)
             else:
-                app.log(f"(Experimental) Spreader failed: {spread_file}")
+                reporter.log(f"(Experimental) Spreader failed: {spread_file}")
         except Exception as e:
-            app.log(f"(Experimental) Spreader crashed: {e}")
+            reporter.log(f"(Experimental) Spreader crashed: {e}")
     
-    app.log(f"⏱️ Duration: {int(minutes)}:{int(seconds):02d} ({time.time() - t0:.2f}s)")
-
+    reporter.log(f"⏱️ Duration: {int(minutes)}:{int(seconds):02d} ({time.time() - t0:.2f}s)")
+
+    return {
+        "mode": mode,
+        "selected_day": selected_day,
+        "end_day": end_day,
+        "jobs": len(results),
+        "failed": len(incomplete),
+        "files": files,
+        "report": report_file,
+        "job_p50": percentile(timings.samples["job"], 50),
+        "job_p95": percentile(timings.samples["job"], 95),
+        "elapsed": round(elapsed, 2),
+        "stats": stats,
+    }
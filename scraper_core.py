@@ -1,31 +1,174 @@
 # scraper_core.py
 import traceback
 import os
-import time
+import re
 import logging
 from datetime import datetime
 from datetime import timedelta
+from collections import defaultdict
 from dateutil import parser as dateparser
 import asyncio
+import itertools
+from urllib.parse import urlparse
 from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeout
 
 from utils import (
-    clear_first_time_overlays, NoWOError, NoOpenWOError,
-    get_work_order_url, get_job_type_and_address, MISC_DIR,
-    get_contractor_assignments, extract_wo_date, extract_cid_and_time
+    clear_first_time_overlays, NoWOError, NoOpenWOError, is_login_page,
+    get_work_order_url, get_job_type_and_address, BASE_URL, STATE_PATH,
+    get_contractor_assignments, extract_wo_date, parse_calendar_events, job_in_range
 )
+from wo_cache import wo_page_matches
+from throttle import RATE_LIMIT_CODES, parse_retry_after
+from retry import RateLimitedError, classify_failure, TRANSIENT, PERMANENT
+from instrumentation import StageTimer
+from journal import job_key
 
-CALENDAR_URL = "http://inside.sockettelecom.com/events/calendar.php"
-CUSTOMER_URL_TEMPLATE = "http://inside.sockettelecom.com/menu.php?coid=1&tabid=7&parentid=9&customerid={}"
+CALENDAR_URL = BASE_URL + "events/calendar.php"
+CUSTOMER_URL_TEMPLATE = BASE_URL + "menu.php?coid=1&tabid=7&parentid=9&customerid={}"
+CALENDAR_PAGES = 4  # week pages loaded at once in range mode
+WO_LOOKUP_TIMEOUT = 20  # seconds; must outlast utils.WO_TABLE_TIMEOUT (10 s) plus the row read
 
 logger = logging.getLogger(__name__)
 
-async def init_playwright_page(headless: bool = True, browser=None, playwright=None):
+INTRANET_HOST = urlparse(BASE_URL).hostname
+
+# URL patterns per blockable category. Regexes so query strings (?v=123) still match.
+BLOCK_PATTERNS = {
+    "image": re.compile(r"\.(png|jpe?g|gif|webp|svg|ico|bmp)(\?.*)?$", re.I),
+    "font": re.compile(r"\.(woff2?|ttf|otf|eot)(\?.*)?$", re.I),
+    "media": re.compile(r"\.(mp4|webm|ogg|mp3|wav|m4a)(\?.*)?$", re.I),
+    "stylesheet": re.compile(r"\.css(\?.*)?$", re.I),
+    "third_party": re.compile(rf"^https?://(?!{re.escape(INTRANET_HOST)}(?::\d+)?/)", re.I),
+}
+
+# "strict" also drops CSS and off-site hosts (CDNs); only use it if the pages
+# still render their scripts and visibility checks without them.
+BLOCK_PROFILES = {
+    "off": [],
+    "images": ["image"],
+    "lean": ["image", "font", "media"],
+    "strict": ["image", "font", "media", "stylesheet", "third_party"],
+}
+
+# Rough transfer sizes for the "bytes saved" estimate; aborted requests report no size
+BLOCKED_SIZE_ESTIMATES = {
+    "image": 30_000,
+    "font": 40_000,
+    "media": 500_000,
+    "stylesheet": 20_000,
+    "third_party": 25_000,
+}
+
+class RouteStats:
+    """Per-run counters for blocked vs. allowed browser traffic."""
+    def __init__(self):
+        self.blocked = defaultdict(int)
+        self.allowed = 0
+        self.allowed_bytes = 0
+
+    def on_response(self, response):
+        self.allowed += 1
+        try:
+            self.allowed_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    def merge(self, other):
+        """Fold in the counters of another RouteStats, e.g. from a shard process."""
+        for cat, n in other.blocked.items():
+            self.blocked[cat] += n
+        self.allowed += other.allowed
+        self.allowed_bytes += other.allowed_bytes
+
+    def summary(self):
+        blocked_total = sum(self.blocked.values())
+        saved = sum(BLOCKED_SIZE_ESTIMATES.get(cat, 0) * n for cat, n in self.blocked.items())
+        detail = ", ".join(f"{cat} {n}" for cat, n in sorted(self.blocked.items())) or "none"
+        return (
+            f"{blocked_total} blocked ({detail}), {self.allowed} allowed "
+            f"({self.allowed_bytes / 1_048_576:.1f} MB), ~{saved / 1_048_576:.1f} MB saved"
+        )
+
+async def apply_block_profile(context, profile="images", route_stats=None):
+    """Install one abort route per blocked category of the profile."""
+    categories = BLOCK_PROFILES.get(profile)
+    if categories is None:
+        logger.warning(f"Unknown block profile '{profile}', blocking images only")
+        categories = BLOCK_PROFILES["images"]
+
+    for category in categories:
+        # Playwright passes (route, request); category must stay keyword-only
+        async def _abort(route, request, *, category=category):
+            if route_stats is not None:
+                route_stats.blocked[category] += 1
+            await route.abort()
+        try:
+            await context.route(BLOCK_PATTERNS[category], _abort)
+        except Exception as e:
+            logger.debug(f"Could not set route for blocking {category}: {e}")
+
+    if route_stats is not None:
+        context.on("response", route_stats.on_response)
+
+# HAR record/replay. A recording is a directory with one archive per browser
+# context (Playwright writes each when its context closes); a replay serves
+# every request from those archives and never touches the network.
+HAR_MODES = ("record", "replay")
+HAR_SUFFIX = ".har.zip"
+HAR_URL_FILTER = re.compile(rf"^https?://{re.escape(INTRANET_HOST)}(?::\d+)?/", re.I)
+_har_seq = itertools.count(1)
+
+def har_archives(har_dir):
+    """Archives of the recording in har_dir, oldest first."""
+    if not har_dir or not os.path.isdir(har_dir):
+        return []
+    paths = [os.path.join(har_dir, n) for n in os.listdir(har_dir) if n.endswith(HAR_SUFFIX)]
+    return sorted(paths, key=os.path.getmtime)
+
+async def _har_miss(route):
+    logger.debug(f"Not in HAR recording, aborted: {route.request.url}")
+    await route.abort()
+
+# The calendar is FullCalendar v3 (jQuery plugin on the .fc element).
+# Returns false when the API isn't reachable so the caller can fall back to clicking.
+CALENDAR_GOTO_JS = """
+(date) => {
+    const $ = window.jQuery;
+    const el = document.querySelector(".fc");
+    if (!$ || !el || !$.fn.fullCalendar || !$(el).data("fullCalendar")) return false;
+    $(el).fullCalendar("gotoDate", date);
+    return true;
+}
+"""
+
+# Text and day of every calendar event. The day comes from the background
+# cell in the same column as the event's content-skeleton cell.
+CALENDAR_EVENTS_JS = """
+(links) => links.map(a => {
+    let date = null;
+    const td = a.closest("td");
+    const grid = a.closest(".fc-time-grid");
+    if (td && grid) {
+        const idx = Array.prototype.indexOf.call(td.parentElement.children, td);
+        const bgRow = grid.querySelector(".fc-bg tr");
+        const bgTd = bgRow ? bgRow.children[idx] : null;
+        date = bgTd ? bgTd.getAttribute("data-date") : null;
+    }
+    return {text: a.innerText, href: a.getAttribute("href"), date: date};
+})
+"""
+
+async def init_playwright_page(headless: bool = True, browser=None, playwright=None, storage_state=None,
+                               block_profile="images", route_stats=None, har_mode=None, har_dir=None):
     """
     Initialize Playwright browser/context/page.
     If browser and playwright are provided, re-use them and return (context, page).
     Otherwise, start a new Playwright instance and return (playwright, browser, context, page).
-    Falls back cleanly if storage_state file is missing or corrupted.
+    storage_state (a dict from LoginSession) seeds the context in memory; otherwise
+    Misc/state.json is used. Falls back cleanly if the state file is missing or corrupted.
+    block_profile names an entry of BLOCK_PROFILES; route_stats (a RouteStats) counts traffic.
+    har_mode "record" archives the context's intranet traffic into har_dir;
+    "replay" serves the context entirely from the archives in har_dir.
     """
 
     # Start Playwright/browser if not passed in
@@ -46,14 +189,20 @@ async def init_playwright_page(headless: bool = True, browser=None, playwright=N
         owns_browser = False
 
     # Prepare new_context kwargs
-    state_path = os.path.join(MISC_DIR, "state.json")
+    state_path = STATE_PATH
     context_kwargs = {
         "java_script_enabled": True,
         "bypass_csp": True,
         "viewport": {"width": 1920, "height": 1080},
     }
-    if os.path.exists(state_path):
+    if storage_state is not None:
+        context_kwargs["storage_state"] = storage_state
+    elif os.path.exists(state_path):
         context_kwargs["storage_state"] = state_path
+    if har_mode == "record":
+        os.makedirs(har_dir, exist_ok=True)
+        context_kwargs["record_har_path"] = os.path.join(har_dir, f"{os.getpid()}-{next(_har_seq)}{HAR_SUFFIX}")
+        context_kwargs["record_har_url_filter"] = HAR_URL_FILTER
 
     # Create context, with fallback if storage_state is invalid
     try:
@@ -61,7 +210,7 @@ async def init_playwright_page(headless: bool = True, browser=None, playwright=N
     except Exception as e:
         logger.warning(f"Failed to load storage_state from {state_path}: {e}")
         # Remove corrupted file if present
-        if os.path.exists(state_path):
+        if storage_state is None and os.path.exists(state_path):
             try:
                 os.remove(state_path)
                 logger.info(f"Removed corrupted state file: {state_path}")
@@ -71,17 +220,18 @@ async def init_playwright_page(headless: bool = True, browser=None, playwright=N
         context_kwargs.pop("storage_state", None)
         context = await browser.new_context(**context_kwargs)
 
-    # Block images (optional, since blink-settings may already disable them)
-    async def block_resources(route):
-        if route.request.resource_type == "image":
-            await route.abort()
-        else:
-            await route.continue_()
+    # Routes run newest first: a replay tries the archives, then the block
+    # profile, and aborts whatever is left instead of fetching it.
+    if har_mode == "replay":
+        await context.route("**/*", _har_miss)
 
-    try:
-        await context.route("**/*", block_resources)
-    except Exception as e:
-        logger.debug(f"Could not set route for blocking resources: {e}")
+    # Only the URLs a profile blocks are routed into Python; everything else
+    # never leaves the browser. Images are also disabled via blink-settings.
+    await apply_block_profile(context, block_profile, route_stats)
+
+    if har_mode == "replay":
+        for path in har_archives(har_dir):
+            await context.route_from_har(path, not_found="fallback")
 
     page = await context.new_page()
 
@@ -94,6 +244,9 @@ async def init_playwright_page(headless: bool = True, browser=None, playwright=N
 async def scrape_jobs(page: Page, mode="week", imported_jobs=None, selected_day=None, test_mode=False, test_limit=10, log=print):
     # Assumes: you are already logged in and on the right context/page
     await page.goto(CALENDAR_URL)
+    if is_login_page(page):
+        # A dead session would otherwise read as an empty calendar
+        raise RuntimeError("Session expired: the calendar redirected to the login page")
     
     # Step 1: Set View (Week or Day)
     try:
@@ -112,7 +265,6 @@ async def scrape_jobs(page: Page, mode="week", imported_jobs=None, selected_day=
         try:
             raw_selected_date = dateparser.parse(selected_day).date()
             if mode == "week":
-                weekday = raw_selected_date.weekday()  # 0=Monday
                 days_to_sunday = (raw_selected_date.weekday() + 1) % 7
                 target_date = raw_selected_date - timedelta(days=days_to_sunday)
             else:
@@ -130,22 +282,39 @@ async def scrape_jobs(page: Page, mode="week", imported_jobs=None, selected_day=
                             end_str = parts[1].strip()
                             if "," not in end_str:
                                 end_str += ", " + str(datetime.now().year)
+                            if "," not in start_str:
+                                # Year only appears once, at the end of the range
+                                start_str += ", " + end_str.rsplit(",", 1)[1].strip()
                             return dateparser.parse(start_str).date()
                     return dateparser.parse(header_text, fuzzy=True).date()
                 except Exception:
                     return None
 
+            # Jump straight there through FullCalendar; the header only confirms it
+            jumped = await page.evaluate(CALENDAR_GOTO_JS, target_date.isoformat())
+            if jumped:
+                await page.wait_for_selector("#spinner", state="hidden", timeout=10_000)
             current_date = await get_current_calendar_date()
-            nav_tries = 0
 
-            while current_date and current_date != target_date and nav_tries < 15:
-                if current_date < target_date:
-                    await page.click("button.fc-next-button")
-                else:
-                    await page.click("button.fc-prev-button")
-                await asyncio.sleep(.25)
-                current_date = await get_current_calendar_date()
-                nav_tries += 1
+            # No calendar API on the page: step with prev/next, waiting on the header
+            # instead of sleeping. The step count is bounded by the distance.
+            nav_tries = 0
+            if current_date and current_date != target_date:
+                step_days = 7 if mode == "week" else 1
+                max_steps = abs((target_date - current_date).days) // step_days + 2
+                while current_date and current_date != target_date and nav_tries < max_steps:
+                    header_before = await page.locator(".fc-center h2").text_content()
+                    if current_date < target_date:
+                        await page.click("button.fc-next-button")
+                    else:
+                        await page.click("button.fc-prev-button")
+                    await page.wait_for_function(
+                        "(prev) => { const h = document.querySelector('.fc-center h2'); return h && h.textContent !== prev; }",
+                        arg=header_before,
+                        timeout=5000
+                    )
+                    current_date = await get_current_calendar_date()
+                    nav_tries += 1
 
             if current_date == target_date:
                 log(f"📆 Calendar now displaying {current_date}")
@@ -163,97 +332,162 @@ async def scrape_jobs(page: Page, mode="week", imported_jobs=None, selected_day=
     except PlaywrightTimeout:
         log("⚠️ No 'Residential Fiber Install' jobs detected.")
 
-    # Step 4: Extract metadata
-    job_links = await page.query_selector_all('a.fc-time-grid-event')
-    results = []
-    counter = 0
-
+    # Step 4: Extract metadata, all events in one round trip
     log("Scraping Calendar...")
-    for link in job_links:
-        text = await link.inner_text()
-        if "Residential Fiber Install" not in text:
-            continue
-
-        # You must pass a compatible async extract_cid_and_time or adapt below:
-        cid, name, time_slot = await extract_cid_and_time(link, text) if extract_cid_and_time else (None, None, None)
-        if not cid:
-            continue
-
-        counter += 1
-        results.append({
-            "cid": cid,
-            "name": name,
-            "time": time_slot
-        })
-
-        if test_mode and len(results) >= test_limit:
-            log("🔬 Test mode: Job limit reached. Exiting early.")
-            break
+    events = await page.eval_on_selector_all('a.fc-time-grid-event', CALENDAR_EVENTS_JS)
+    results = parse_calendar_events(events, limit=test_limit if test_mode else None)
+    if test_mode and len(results) >= test_limit:
+        log("🔬 Test mode: Job limit reached. Exiting early.")
 
     log(f"✅ Queued {len(results)} jobs for processing.")
     return results
 
-async def process_job_entries(page: Page, job: dict, log=print):
-    cid = job.get("cid")
-    name = job.get("name")
-    time_slot = job.get("time")
+def range_weeks(start_date, end_date):
+    """The Sunday of every calendar week that overlaps start_date..end_date."""
+    sunday = start_date - timedelta(days=(start_date.weekday() + 1) % 7)
+    weeks = []
+    while sunday <= end_date:
+        weeks.append(sunday)
+        sunday += timedelta(days=7)
+    return weeks
+
+async def scrape_date_range(open_page, close_page, start_date, end_date, test_mode=False, test_limit=10,
+                            log=print, max_pages=CALENDAR_PAGES):
+    """
+    Calendar metadata for every job from start_date to end_date (dates).
+    One week view per week, up to max_pages at once, each on a page from
+    open_page() -> (context, page) and handed back with close_page(context, page).
+    Events are merged in calendar order, de-duplicated and clipped to the range.
+    """
+    weeks = range_weeks(start_date, end_date)
+    log(f"📅 Reading {len(weeks)} calendar weeks ({start_date} to {end_date}), {min(max_pages, len(weeks))} at a time…")
+    pages = asyncio.Semaphore(max_pages)
+
+    async def scrape_week(sunday):
+        async with pages:
+            tag = f"[{sunday.strftime('%m/%d')}]"
+            context, page = await open_page()
+            try:
+                return await scrape_jobs(
+                    page, mode="week", selected_day=sunday.strftime("%m/%d/%y"),
+                    log=lambda msg: log(f"{tag} {msg}")
+                )
+            except Exception as e:
+                log(f"❌ {tag} Calendar week failed: {e}")
+                return []
+            finally:
+                await close_page(context, page)
+
+    per_week = await asyncio.gather(*(scrape_week(sunday) for sunday in weeks))
+
+    jobs, seen = [], set()
+    for week_jobs in per_week:
+        for job in week_jobs:
+            key = job_key(job)
+            if key in seen or not job_in_range(job, start_date, end_date):
+                continue
+            seen.add(key)
+            jobs.append(job)
+    if test_mode:
+        jobs = jobs[:test_limit]
+    log(f"✅ Queued {len(jobs)} jobs from {len(weeks)} weeks.")
+    return jobs
+
+async def goto_checked(page: Page, url):
+    """page.goto that turns a rate-limit response into RateLimitedError."""
+    response = await page.goto(url)
+    if response is not None and response.status in RATE_LIMIT_CODES:
+        raise RateLimitedError(response.status, parse_retry_after(response.headers.get("retry-after")))
+    return response
+
+async def resolve_work_order(page: Page, cid, log=print, timer=None):
+    """
+    Load the customer page and find the WO to scrape.
+    Returns (workorder_url, wo_number); (None, None) on timeout.
+    Raises NoWOError / NoOpenWOError like get_work_order_url; other errors
+    propagate to be classified (Playwright errors are transient).
+    timer (a StageTimer) gets the customer_page/overlays/main_view/wo_lookup stages.
+    """
+    timer = timer or StageTimer()
     customer_url = CUSTOMER_URL_TEMPLATE.format(cid)
 
-    try:
-        t0 = time.perf_counter()
-        await page.goto(customer_url)
-        #print(f"[{cid}] Customer page took {time.perf_counter() - t0:.2f}s to load")
-        if clear_first_time_overlays:
-            t0 = time.perf_counter()
+    with timer.stage("customer_page"):
+        await goto_checked(page, customer_url)
+    if clear_first_time_overlays:
+        with timer.stage("overlays"):
             await clear_first_time_overlays(page)
-            #print(f"[{cid}] Clear overlay took {time.perf_counter() - t0:.2f}s")
 
-        # Switch to MainView iframe
-        try:
-            t0 = time.perf_counter()
+    # Switch to MainView iframe
+    try:
+        with timer.stage("main_view"):
             await page.wait_for_selector('iframe[name="MainView"]', timeout=10_000)
             frame = page.frame(name="MainView")
-            #print(f"[{cid}] Find and assign MainView took {time.perf_counter() - t0:.2f}s")
-        except PlaywrightTimeout:
-            frame = page.main_frame()
+    except PlaywrightTimeout:
+        frame = page.main_frame()
 
-        # Wait for WO
-        async def _wait_for_work_order():
-            try:
-                return await get_work_order_url(frame, log=log)
-            except (NoWOError, NoOpenWOError):
-                raise
-            except Exception:
-                return False
+    # Wait for WO; the outer limit leaves room for the table wait inside it
+    try:
+        with timer.stage("wo_lookup"):
+            workorder_url, wo_number = await asyncio.wait_for(
+                get_work_order_url(frame, log=log), timeout=WO_LOOKUP_TIMEOUT
+            )
+    except (PlaywrightTimeout, asyncio.TimeoutError):
+        workorder_url, wo_number = None, None
+    return workorder_url, wo_number
+
+async def process_job_entries(page: Page, job: dict, log=print, wo_cache=None, timer=None):
+    """
+    Scrape one job's WO in the browser. timer (a StageTimer) collects
+    per-stage durations; see instrumentation.STAGES.
+    """
+    cid = job.get("cid")
+    name = job.get("name")
+    time_slot = job.get("time")
+    timer = timer or StageTimer()
 
-        try:
-            t0 = time.perf_counter()
-            workorder_url, wo_number = await asyncio.wait_for(_wait_for_work_order(), timeout=10)
-            #print(f"[{cid}] WO URL Scrape took {time.perf_counter() - t0:.2f}s")
-        except (NoWOError, NoOpenWOError) as e:
-            job["error"] = str(e)
-            log(f"[{cid}] No work order found: {e}")
-            return None
-        except asyncio.TimeoutError:
-            workorder_url, wo_number = None, None
-
-        if not workorder_url:
-            log(f"[{cid}] No workorder_url found, skipping job")
-            return None
-
-        t0 = time.perf_counter()
-        await page.goto(workorder_url)
-        #print(f"[{cid}] WO took {time.perf_counter() - t0:.2f}s to load")
-
-        t0 = time.perf_counter()
-        job_type, address = (await get_job_type_and_address(page)) if get_job_type_and_address else (None, None)
-        #print(f"[{cid}] job type took {time.perf_counter() - t0:.2f}s")
-        t0 = time.perf_counter()
-        contractor_info = (await get_contractor_assignments(page)) if get_contractor_assignments else None
-        #print(f"[{cid}] Contractor extract took {time.perf_counter() - t0:.2f}s")
-        t0 = time.perf_counter()
-        job_date = (await extract_wo_date(page))
-        #print(f"[{cid}] Date extract took {time.perf_counter() - t0:.2f}s")
+    try:
+        workorder_url = wo_number = None
+
+        # Known CID: go straight to its WO page, as long as it still belongs to the customer
+        cached = wo_cache.get(cid) if wo_cache else None
+        if cached:
+            cached_url, cached_wo = cached
+            with timer.stage("cached_wo_page"):
+                await goto_checked(page, cached_url)
+                matches = wo_page_matches(await page.inner_text("body"), cid, cached_wo)
+            if matches:
+                workorder_url, wo_number = cached_url, cached_wo
+            else:
+                log(f"[{cid}] Cached WO {cached_wo} no longer matches, looking it up again")
+                wo_cache.invalidate(cid)
+
+        if workorder_url is None:
+            try:
+                workorder_url, wo_number = await resolve_work_order(page, cid, log=log, timer=timer)
+            except (NoWOError, NoOpenWOError) as e:
+                job["error"] = str(e)
+                job["failure"] = PERMANENT
+                log(f"[{cid}] No work order found: {e}")
+                return None
+
+            if not workorder_url:
+                # The table didn't show up in time; worth another try
+                job["error"] = "Timed out looking up work order"
+                job["failure"] = TRANSIENT
+                log(f"[{cid}] No workorder_url found, skipping job")
+                return None
+            if wo_cache:
+                wo_cache.put(cid, workorder_url, wo_number)
+
+            with timer.stage("wo_page"):
+                await goto_checked(page, workorder_url)
+
+        with timer.stage("job_type"):
+            job_type, address = (await get_job_type_and_address(page)) if get_job_type_and_address else (None, None)
+        with timer.stage("contractor"):
+            contractor_info = (await get_contractor_assignments(page)) if get_contractor_assignments else None
+        with timer.stage("date"):
+            job_date = (await extract_wo_date(page, timer=timer))
 
         return {
             "company": contractor_info,
@@ -266,7 +500,15 @@ async def process_job_entries(page: Page, job: dict, log=print):
             "wo": wo_number
         }
 
+    except RateLimitedError as e:
+        job["error"] = str(e)
+        job["failure"] = classify_failure(e)
+        job["retry_after"] = e.retry_after
+        log(f"[{cid}] {e}")
+        return None
     except Exception as e:
+        job["error"] = f"{type(e).__name__}: {e}"
+        job["failure"] = classify_failure(e)
         log(f"Couldn't parse {cid}: {e}")
         traceback.print_exc()
-        return None
\ No newline at end of file
+        return None
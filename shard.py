@@ -0,0 +1,189 @@
+# shard.py
+import math
+import time
+import queue
+import asyncio
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from scraper_core import init_playwright_page, RouteStats
+from http_scraper import create_http_client, fetch_job
+from utils import is_login_page
+from wo_cache import WOCache
+from retry import backoff_delay, MAX_ATTEMPTS, TRANSIENT, RATE_LIMITED
+from journal import job_key
+from instrumentation import StageTimer, RunTimings
+
+def split_jobs(jobs, n_shards):
+    """Deal jobs round-robin so every shard gets a mix of days and time slots."""
+    shards = [jobs[i::n_shards] for i in range(n_shards)]
+    return [shard for shard in shards if shard]
+
+def _run_shard(shard_idx, jobs, state, settings, events):
+    # Process entry point; must stay top level so it pickles under spawn
+    return asyncio.run(_scrape_shard(shard_idx, jobs, state, settings, events))
+
+async def _scrape_shard(shard_idx, jobs, state, settings, events):
+    """
+    One process: its own Playwright driver, Chromium and worker contexts.
+    Each settled job is put on `events` as (job, result) for the parent.
+    Shards never log in: they'd race each other on the state file. Once the
+    session is found expired, every job left is reported back with
+    job["session_expired"] set, for the parent to redo after logging in.
+    """
+    route_stats = RouteStats()
+    timings = RunTimings()
+    worker_stats = []
+    retried = [0]
+    http_fallbacks = [0]
+    session_expired = [False]
+    wo_cache = WOCache() if settings["use_wo_cache"] else None
+    http_client = create_http_client(state, max_connections=settings["workers"]) if settings["http_mode"] else None
+
+    playwright, browser, context, page = await init_playwright_page(
+        headless=True, storage_state=state,
+        block_profile=settings["block_profile"], route_stats=route_stats,
+        har_mode=settings["har_mode"], har_dir=settings["har_dir"]
+    )
+    await page.close()
+    await context.close()
+
+    job_queue = asyncio.Queue()
+    for job in jobs:
+        job_queue.put_nowait(job)
+
+    def count_fallback():
+        http_fallbacks[0] += 1
+
+    async def worker(idx):
+        worker_context = worker_page = None
+        stats = {"worker": idx, "jobs": 0, "busy": 0.0}
+        worker_stats.append(stats)
+
+        async def get_worker_page():
+            nonlocal worker_context, worker_page
+            if worker_page is None:
+                worker_context, worker_page = await init_playwright_page(
+                    browser=browser, playwright=playwright, storage_state=state,
+                    block_profile=settings["block_profile"], route_stats=route_stats,
+                    har_mode=settings["har_mode"], har_dir=settings["har_dir"]
+                )
+            return worker_page
+
+        try:
+            while not job_queue.empty():
+                job = job_queue.get_nowait()
+                job_t0 = time.perf_counter()
+                attempt = 0
+                result = None
+                while not session_expired[0]:
+                    timer = StageTimer()
+                    attempt_t0 = time.perf_counter()
+                    result = await fetch_job(
+                        job, get_worker_page, http_client=http_client, wo_cache=wo_cache,
+                        timer=timer, on_fallback=count_fallback
+                    )
+                    timings.record(timer, time.perf_counter() - attempt_t0)
+                    if result is None and worker_page is not None and is_login_page(worker_page):
+                        session_expired[0] = True
+                        break
+                    failure = job.get("failure", TRANSIENT) if result is None else None
+                    attempt += 1
+                    if failure not in (TRANSIENT, RATE_LIMITED) or attempt >= MAX_ATTEMPTS:
+                        break
+                    # No shared queue across processes, so the retry waits in place
+                    retried[0] += 1
+                    await asyncio.sleep(backoff_delay(attempt, retry_after=job.get("retry_after")))
+
+                if session_expired[0] and result is None:
+                    # Hand it back untried (or failed on the login page) for the parent's re-login
+                    job["error"] = "Session expired in shard"
+                    job["failure"] = TRANSIENT
+                    job["session_expired"] = True
+
+                stats["jobs"] += 1
+                stats["busy"] += time.perf_counter() - job_t0
+                events.put((job, result))
+        finally:
+            if worker_page is not None:
+                await worker_page.close()
+                await worker_context.close()
+
+    try:
+        await asyncio.gather(*(worker(f"{shard_idx}.{i}") for i in range(settings["workers"])))
+    finally:
+        if http_client is not None:
+            await http_client.aclose()
+        if wo_cache is not None:
+            wo_cache.close()
+        await browser.close()
+        await playwright.stop()
+
+    return {
+        "shard": shard_idx,
+        "route_stats": route_stats,
+        "timings": timings,
+        "worker_stats": worker_stats,
+        "retried": retried[0],
+        "http_fallbacks": http_fallbacks[0],
+    }
+
+async def run_sharded(jobs, state, options, n_shards, on_result, log=print):
+    """
+    Scrape jobs across n_shards processes, each with its own browser and
+    options.workers / n_shards contexts. on_result(job, result) is awaited in
+    this process for every settled job; returns the per-shard summaries.
+    state is the parent's logged-in storage state; jobs a shard couldn't run
+    on it come back failed with job["session_expired"] set.
+    """
+    shards = split_jobs(jobs, n_shards)
+    if not shards:
+        return []
+    settings = {
+        "workers": max(1, math.ceil(options.workers / len(shards))),
+        "http_mode": options.http_mode and not options.har_mode,
+        "use_wo_cache": options.use_wo_cache and not options.har_mode,
+        "block_profile": options.block_profile,
+        "har_mode": options.har_mode,
+        "har_dir": options.har_dir,
+    }
+    log(f"🧩 Sharding {len(jobs)} jobs over {len(shards)} processes × {settings['workers']} workers")
+
+    loop = asyncio.get_running_loop()
+    manager = multiprocessing.Manager()
+    events = manager.Queue()
+    try:
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            futures = [
+                loop.run_in_executor(pool, _run_shard, idx, shard, state, settings, events)
+                for idx, shard in enumerate(shards)
+            ]
+            reported = set()
+            while len(reported) < len(jobs):
+                try:
+                    job, result = await loop.run_in_executor(None, partial(events.get, timeout=1))
+                except queue.Empty:
+                    # Shards put every job before returning, so all done + empty means finished
+                    if all(f.done() for f in futures) and events.empty():
+                        break
+                    continue
+                reported.add(job_key(job))
+                await on_result(job, result)
+
+            # A crashed shard never reports its remaining jobs; fail them so resume retries them
+            for job in jobs:
+                if job_key(job) not in reported:
+                    job["error"] = "Shard process crashed"
+                    job["failure"] = TRANSIENT
+                    await on_result(job, None)
+
+            summaries = []
+            for idx, future in enumerate(futures):
+                try:
+                    summaries.append(await future)
+                except Exception as e:
+                    log(f"❌ Shard {idx} crashed: {e}")
+            return summaries
+    finally:
+        manager.shutdown()
@@ -1,10 +1,8 @@
 import re
 import sys
 from collections import defaultdict, deque
-import tkinter as tk
+from functools import lru_cache
 from datetime import datetime
-from tkinterdnd2 import TkinterDnD, DND_FILES
-from tkinter import messagebox
 import os
 import json
 from utils import prompt_reassignment, MISC_DIR, __version__
@@ -155,24 +153,46 @@ AREA_COVERAGE = {
 
 TIMESLOT_ORDER = ['8:00', '10:00', '12:00', '1:00', '3:00']
 
+STATE_ZIP_RE = re.compile(r',?\s*[A-Z]{2}\s*\d{5}$')
+CITY_CACHE_SIZE = 8192  # distinct addresses remembered by parse_city
+
+class CityMatcher:
+    """
+    Every city in two precompiled patterns, built once. Like the old per-city
+    scan, the longest city that ends the address or appears in it as a word
+    wins; apostrophes and case are ignored.
+    """
+    def __init__(self, cities):
+        self.by_clean = {}
+        for city in sorted(cities, key=lambda c: -len(c)):
+            self.by_clean.setdefault(city.replace("'", "").lower(), city)
+        self.rank = {clean: i for i, clean in enumerate(self.by_clean)}
+        alternation = "|".join(re.escape(clean) for clean in self.by_clean)
+        # A zero-width lookahead sees every match, even overlapping ones
+        self.word_re = re.compile(rf"(?=\b({alternation})\b)")
+        self.tail_re = re.compile(rf"(?:{alternation})$")
+
+    def match(self, address):
+        text = address.replace("'", "").lower()
+        found = {m.group(1) for m in self.word_re.finditer(text)}
+        tail = self.tail_re.search(text)
+        if tail:
+            found.add(tail.group(0))
+        if not found:
+            return ""
+        return self.by_clean[min(found, key=self.rank.__getitem__)]
+
+CITY_MATCHER = CityMatcher(CITY_LIST)
+
 # --- Utility functions ---
+@lru_cache(maxsize=CITY_CACHE_SIZE)
 def parse_city(address):
     # Remove state and zip at the end (e.g. ', MO 65109' or ', 65101')
     address = address.strip()
-    state_zip = re.search(r',?\s*[A-Z]{2}\s*\d{5}$', address)
+    state_zip = STATE_ZIP_RE.search(address)
     if state_zip:
         address = address[:state_zip.start()]
-    # Now find the longest city at the end of the remaining address
-    address_lower = address.lower()
-    for city in sorted(CITY_LIST, key=lambda c: -len(c)):
-        # Remove apostrophes for matching, ignore case, allow city to be just before any end
-        city_clean = city.replace("'", "").lower()
-        if address_lower.replace("'", "").endswith(city_clean):
-            return city
-        # Try matching with city as a word near the end (with or without 'apt', etc.)
-        if re.search(rf"\b{re.escape(city_clean)}\b", address_lower.replace("'", "")):
-            return city
-    return ""
+    return CITY_MATCHER.match(address)
 
 def extract_timeslot(job_line):
     m = re.match(r'^(\d{1,2}:\d{2})', job_line)
@@ -571,6 +591,8 @@ def apply_forced_assignments(jobs):
         job['forced_contractor'] = None
 
 def open_settings_gui(root):
+    import tkinter as tk
+    from tkinter import messagebox
     config = load_spreader_config()
     limits = config.get("limits", {})
     forced_streets = config.get("forced_streets", [])
@@ -638,6 +660,11 @@ def open_settings_gui(root):
     root.wait_window(settings_win)
 
 def start_gui():
+    # GUI-only imports; run_process stays usable without Tk
+    import tkinter as tk
+    from tkinter import messagebox
+    from tkinterdnd2 import TkinterDnD, DND_FILES
+
     def on_drop(event):
         file_path = event.data.strip('{}')  # Handles filenames with spaces
         if not file_path.lower().endswith(".txt"):
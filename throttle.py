@@ -0,0 +1,133 @@
+# throttle.py
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+
+RATE_LIMIT_CODES = [429, 403, 503]
+
+def parse_retry_after(value, default=5.0):
+    """Retry-After is either delta-seconds or an HTTP date; returns seconds to wait."""
+    if not value:
+        return default
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+def percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for the scrape workers.
+    Every `window` completions the limit grows by one while p95 job latency
+    stays within `latency_slack` of the best p95 seen and errors stay under
+    `max_error_rate`; otherwise it shrinks by a quarter. Rate-limit responses
+    halve it and pause new work for the Retry-After period.
+    """
+    def __init__(self, max_limit, start=4, min_limit=1, window=8,
+                 latency_slack=1.5, max_error_rate=0.1, log=print):
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.limit = max(min_limit, min(start, self.max_limit))
+        self.window = window
+        self.latency_slack = latency_slack
+        self.max_error_rate = max_error_rate
+        self.log = log
+
+        self.active = 0
+        self.paused_until = 0.0
+        self.best_p95 = None
+        self.peak = self.limit
+        self.start_limit = self.limit
+        self.backoffs = 0
+        self._last_backoff = 0.0
+        self._latencies = deque(maxlen=window)
+        self._errors = deque(maxlen=window)
+        self._since_adjust = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        while True:
+            delay = self.paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self._cond:
+                await self._cond.wait_for(lambda: self.active < self.limit)
+                if time.monotonic() >= self.paused_until:
+                    self.active += 1
+                    return
+
+    async def release(self):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+    def record(self, latency, ok=True):
+        """Feed one finished job into the controller."""
+        self._latencies.append(latency)
+        self._errors.append(0 if ok else 1)
+        self._since_adjust += 1
+        if self._since_adjust < self.window:
+            return
+        self._since_adjust = 0
+
+        p95 = percentile(list(self._latencies), 95)
+        error_rate = sum(self._errors) / len(self._errors)
+        if self.best_p95 is None or p95 < self.best_p95:
+            self.best_p95 = p95
+
+        healthy = p95 <= self.best_p95 * self.latency_slack and error_rate <= self.max_error_rate
+        if healthy:
+            self._set_limit(self.limit + 1)
+        else:
+            self._set_limit(int(self.limit * 0.75), reason=f"p95 {p95:.1f}s, errors {error_rate:.0%}")
+
+    def on_status(self, status, headers=None):
+        """Response hook: back off on rate-limit codes and honor Retry-After."""
+        if status not in RATE_LIMIT_CODES:
+            return
+        headers = headers or {}
+        retry_after = parse_retry_after(headers.get("retry-after") or headers.get("Retry-After"))
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + retry_after)
+
+        # One burst of 429s is one congestion signal
+        if now - self._last_backoff < retry_after + 1:
+            return
+        self._last_backoff = now
+        self.backoffs += 1
+        self._set_limit(self.limit // 2, reason=f"HTTP {status}, retry after {retry_after:.0f}s")
+
+    def _set_limit(self, new_limit, reason=None):
+        new_limit = max(self.min_limit, min(self.max_limit, new_limit))
+        if new_limit == self.limit:
+            return
+        if reason:
+            self.log(f"🐢 Workers {self.limit} → {new_limit} ({reason})")
+        self.limit = new_limit
+        self.peak = max(self.peak, new_limit)
+
+    def summary(self):
+        return (
+            f"adaptive {self.start_limit}→{self.limit} of max {self.max_limit} "
+            f"(peak {self.peak}, {self.backoffs} rate-limit backoffs)"
+        )
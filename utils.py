@@ -1,20 +1,20 @@
 # utils.py
 import os
 import re
+import json
 import sys
 import subprocess
+import time
 import traceback
 import asyncio
-from tkinter import Tk, messagebox, simpledialog
-import pandas as pd
 from pathlib import Path
+from urllib.parse import urlparse
 from datetime import datetime
 from collections import defaultdict
 from dotenv import load_dotenv, set_key
-from openpyxl.utils import get_column_letter
 from openpyxl import load_workbook
 from playwright.sync_api import sync_playwright, Error as PlaywrightError
-import tkinter as tk
+from playwright.async_api import TimeoutError as PlaywrightTimeout
 import threading
 
 __version__ = "0.2.2"
@@ -55,7 +55,12 @@ os.makedirs(MISC_DIR, exist_ok=True)
 # === CONFIGURATION ===
 load_dotenv(ENV_PATH)
 
-BASE_URL = "http://inside.sockettelecom.com/"
+DEFAULT_BASE_URL = "http://inside.sockettelecom.com/"
+# SCRAPER_BASE_URL (environment or .env) points the scraper elsewhere, e.g. the
+# offline mock intranet in benchmarks/mock_intranet.py
+BASE_URL = os.getenv("SCRAPER_BASE_URL", DEFAULT_BASE_URL).rstrip("/") + "/"
+LOGIN_URL = BASE_URL + "system/login.php"
+WORK_ORDER_URL_TEMPLATE = BASE_URL + "workorders/view.php?nCount={}"
 
 class NoWOError(Exception):
     pass
@@ -64,6 +69,8 @@ class NoOpenWOError(Exception):
 
 # Setup + Creds
 def prompt_for_credentials():
+    # Tk is imported lazily so headless runs never need it
+    from tkinter import Tk, simpledialog
     login_window = Tk()
     login_window.withdraw()
 
@@ -93,6 +100,7 @@ def check_env_or_prompt_login(log=print):
     while True:
         username, password = prompt_for_credentials()
         if not username or not password:
+            from tkinter import messagebox
             messagebox.showerror("Login Cancelled", "Login is required to continue.")
             return None, None
 
@@ -178,6 +186,7 @@ def ensure_playwright(log=print):
         if not is_chromium_installed():
             # Inform user
             try:
+                from tkinter import messagebox, Tk
                 root = Tk()
                 root.withdraw()
                 messagebox.showinfo("Playwright", "Chromium not found; downloading browser binaries now. This may take a few minutes.")
@@ -195,6 +204,7 @@ def ensure_playwright(log=print):
         err_msg = f"Playwright setup failed: {e}\nSee log file for details"
         log(err_msg)
         try:
+            from tkinter import messagebox, Tk
             root = Tk()
             root.withdraw()
             messagebox.showerror("Playwright Error", err_msg)
@@ -208,8 +218,21 @@ def check_for_update():
     return
 
 # Login + Session
+# Session cookies are per host, so another base URL gets its own state file
+STATE_PATH = os.path.join(
+    MISC_DIR,
+    "state.json" if BASE_URL == DEFAULT_BASE_URL else f"state_{urlparse(BASE_URL).hostname}.json"
+)
+
+def save_storage_state(state, path=STATE_PATH):
+    # Write to a temp file and swap it in so readers never see a half-written state
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
 async def handle_login(page, log=print):
-    await page.goto("http://inside.sockettelecom.com/")
+    await page.goto(BASE_URL)
     # If already logged in:
     if "login.php" not in page.url:
         log("✅ Session restored with stored state.")
@@ -218,16 +241,53 @@ async def handle_login(page, log=print):
 
     # Otherwise, login with creds
     user, pw = check_env_or_prompt_login(log)
-    await page.goto("http://inside.sockettelecom.com/system/login.php")
+    await page.goto(LOGIN_URL)
     await page.fill("input[name='username']", user)
     await page.fill("input[name='password']", pw)
     await page.click("#login")
     await page.wait_for_selector("iframe#MainView", timeout=10_000)
     await clear_first_time_overlays(page)
     # Save state for next run
-    await page.context.storage_state(path=os.path.join(MISC_DIR, "state.json"))
+    save_storage_state(await page.context.storage_state())
     log("✅ Logged in via credentials.")
 
+def is_login_page(page):
+    return "login.php" in page.url
+
+class LoginSession:
+    """
+    One login per run. The first caller logs in; every worker context is then
+    seeded from the captured storage state instead of logging in itself.
+    """
+    def __init__(self, log=print):
+        self.log = log
+        self.state = None
+        self.logins = 0
+        self._lock = asyncio.Lock()
+
+    async def ensure(self, page):
+        """Log in on page (once) and return the in-memory storage state."""
+        async with self._lock:
+            if self.state is None:
+                await handle_login(page, self.log)
+                self.state = await page.context.storage_state()
+                self.logins += 1
+            return self.state
+
+    async def refresh(self, page, stale_state):
+        """
+        Re-login after the session expired mid-run. Workers that notice the
+        expiry together share one login; returns the fresh storage state.
+        """
+        async with self._lock:
+            if self.state is not stale_state:
+                return self.state
+            self.log("🔐 Session expired, logging in again…")
+            await handle_login(page, self.log)
+            self.state = await page.context.storage_state()
+            self.logins += 1
+            return self.state
+
 # Browser Interaction
 async def clear_first_time_overlays(page):
     selectors = [
@@ -240,7 +300,8 @@ async def clear_first_time_overlays(page):
             await btn.click()
             await page.wait_for_timeout(100)  # Let DOM update if needed
 
-async def extract_cid_and_time(link, text):
+def parse_cid_and_time(text):
+    """Calendar event text -> (cid, name, time_slot), or (None, None, None) if it doesn't parse."""
     try:
         # Split lines
         lines = text.strip().split("\n")
@@ -263,130 +324,159 @@ async def extract_cid_and_time(link, text):
             return None, None, None
         name = parts[0].strip()
         cid = parts[1].strip()
-        # Optional: parse order #
-        order_match = re.search(r'Order\s*#:(\d+)', parts[2])
-        order_num = order_match.group(1) if order_match else None
         return cid, name, time_slot
     except Exception as e:
         print(f"❌ Error extracting CID/time: {e}")
         return None, None, None
 
+def format_job_date(dt):
+    """M-D-YY without zero padding, the date format used in every export."""
+    fmt = "%#m-%#d-%y" if os.name == "nt" else "%-m-%-d-%y"
+    return dt.strftime(fmt)
+
+def job_date(job):
+    """The job's M-D-YY date as a date, or None if it has none that parses."""
+    try:
+        return datetime.strptime(str(job.get("date") or "").strip(), "%m-%d-%y").date()
+    except ValueError:
+        return None
+
+def job_in_range(job, start_date, end_date):
+    """True if the job falls in start_date..end_date (dates); undated jobs can't be ruled out, so they're kept."""
+    date = job_date(job)
+    return date is None or start_date <= date <= end_date
+
+def parse_calendar_events(events, limit=None):
+    """
+    Turn raw calendar events ({"text", "date"} dicts from scrape_jobs) into job
+    metadata dicts. Only Residential Fiber Install events with a CID are kept.
+    """
+    jobs = []
+    for event in events:
+        text = event.get("text") or ""
+        if "Residential Fiber Install" not in text:
+            continue
+
+        cid, name, time_slot = parse_cid_and_time(text)
+        if not cid:
+            continue
+
+        job = {"cid": cid, "name": name, "time": time_slot}
+        if event.get("date"):
+            try:
+                job["date"] = format_job_date(datetime.strptime(event["date"], "%Y-%m-%d"))
+            except ValueError:
+                pass
+        jobs.append(job)
+
+        if limit and len(jobs) >= limit:
+            break
+    return jobs
+
+def pick_contractor(b_texts):
+    """Pick the primary contractor out of the <b> texts of the contractor list."""
+    for btext in b_texts:
+        if "None Assigned" in btext:
+            return "None Assigned"
+        if " - (Primary" in btext:
+            return btext.split(" - ")[0].strip()
+        elif btext.strip() and "assigned to this work order" not in btext:
+            # fallback for any other contractor <b>
+            return btext.strip()
+    return "Unknown"
+
 async def get_contractor_assignments(page):
     try:
         # Wait for the contractor section (parent) and ContractorList (child) to be visible
         await page.wait_for_selector(".contractorsection #ContractorList", timeout=15_000, state="visible")
         # Now, get all <b> elements inside the contractor list
         contractor_b_tags = await page.locator(".contractorsection #ContractorList b").all_inner_texts()
-        for btext in contractor_b_tags:
-            if "None Assigned" in btext:
-                return "None Assigned"
-            if " - (Primary" in btext:
-                return btext.split(" - ")[0].strip()
-            elif btext.strip() and "assigned to this work order" not in btext:
-                # fallback for any other contractor <b>
-                return btext.strip()
-        return "Unknown"
+        return pick_contractor(contractor_b_tags)
     except Exception as e:
         print(f"❌ Could not extract contractor: {e}")
         return "Unknown"
 
+def select_work_order(rows):
+    """
+    Pick the newest (highest-numbered) in-process Fiber Install WO.
+    rows: list of {"cells": [cell texts], "href": link in the 5th cell or None}.
+    Raises NoWOError or NoOpenWOError if not found.
+    Returns (absolute_url, wo_number).
+    """
+    matches = []
+    has_fiber_install = False
+    for row in rows:
+        cells = [c.strip() for c in row["cells"]]
+        if len(cells) < 5:
+            continue
+
+        job_type = cells[2]
+        # Only match "Fiber Install" AND "In Process"
+        if all(s in job_type for s in ["Fiber", "Install"]):
+            has_fiber_install = True
+        else:
+            continue
+
+        first = cells[0]
+        # skip header or invalid rows
+        if first == "#" or not first.isdigit():
+            continue
+        if "In Process" in cells[3]:
+            matches.append((int(first), row.get("href")))
+
+    if not matches:
+        # Fallback: any "Fiber Install", even if not "In Process"
+        if has_fiber_install:
+            raise NoOpenWOError("No open (In Process) Fiber Install WO found.")
+        raise NoWOError("No Fiber Install WO found at all.")
+
+    # Return WO with the highest number (most recent)
+    wo_number, url = max(matches, key=lambda x: x[0])
+    # Make sure URL is absolute
+    if url and url.startswith("/"):
+        url = BASE_URL.rstrip("/") + url
+    return url, wo_number
+
+WO_TABLE_ROWS_SELECTOR = "#custWork #workShow table tr"
+WO_TABLE_TIMEOUT = 10_000  # ms
+# Same shape select_work_order expects: cell texts plus the link in the 5th cell
+WO_TABLE_ROWS_JS = """
+(rows) => rows.map(tr => {
+    const tds = Array.from(tr.querySelectorAll("td"));
+    const link = tds.length >= 5 ? tds[4].querySelector("a") : null;
+    return {
+        cells: tds.map(td => td.innerText),
+        href: link ? link.getAttribute("href") : null,
+    };
+})
+"""
+
 async def get_work_order_url(frame, log=print):
     """
     Find newest (highest-numbered) in-process Fiber Install WO on customer page.
-    Raises NoWOError or NoOpenWOError if not found.
+    Raises NoWOError or NoOpenWOError only if the table loaded without a matching
+    row; a table that never shows up (timeout) or a Playwright error is raised
+    as-is, so it's retried as transient.
     Returns (absolute_url, wo_number).
     """
+    # Wait for the work order table to load (more general selector)
     try:
-        # Wait for the work order table to load (more general selector)
-        try:
-            await frame.wait_for_selector("#custWork #workShow table", timeout=10_000)
-        except Exception:
-            log("❌ Work Orders table not found inside frame!")
-            raise NoWOError("Work Orders table not found!")
-        rows = await frame.query_selector_all("#custWork #workShow table tr")
-        if not rows:
-            log("❌ No work order rows found inside table.")
-            raise NoWOError("No work order rows found!")
-
-        matches = []
-        for row in rows:
-            tds = await row.query_selector_all("td")
-            if len(tds) < 5:
-                continue
-
-            first = (await tds[0].inner_text()).strip()
-            # skip header or invalid rows
-            if first == "#" or not first.isdigit():
-                continue
-
-            wo_number = int(first)
-            job_type = (await tds[2].inner_text()).strip()
-            status   = (await tds[3].inner_text()).strip()
-            # Only match "Fiber Install" AND "In Process"
-            if all(s in job_type for s in ["Fiber", "Install"]) and "In Process" in status:
-                link_td = await tds[4].query_selector("a")
-                href = await link_td.get_attribute('href') if link_td else None
-                matches.append((wo_number, href))
-
-        if not matches:
-            # Fallback: any "Fiber Install", even if not "In Process"
-            for row in rows:
-                tds = await row.query_selector_all("td")
-                if len(tds) < 5:
-                    continue
-                job_type = (await tds[2].inner_text()).strip()
-                if all(s in job_type for s in ["Fiber", "Install"]):
-                    raise NoOpenWOError("No open (In Process) Fiber Install WO found.")
-            raise NoWOError("No Fiber Install WO found at all.")
-
-        # Return WO with the highest number (most recent)
-        wo_number, url = max(matches, key=lambda x: x[0])
-        # Make sure URL is absolute
-        if url and url.startswith("/"):
-            url = "http://inside.sockettelecom.com" + url
-        return url, wo_number
-
-    except NoWOError:
-        raise
-    except NoOpenWOError:
+        await frame.wait_for_selector("#custWork #workShow table", timeout=WO_TABLE_TIMEOUT)
+    except Exception:
+        log("❌ Work Orders table not found inside frame!")
         raise
-    except Exception as e:
-        log(f"❌ Error in get_work_order_url: {e}")
-        raise NoWOError(str(e))
+    # One round trip for the whole table; selection happens in Python
+    table = await frame.eval_on_selector_all(WO_TABLE_ROWS_SELECTOR, WO_TABLE_ROWS_JS)
+    if not table:
+        log("❌ No work order rows found inside table.")
+        raise NoWOError("No work order rows found!")
 
-async def get_job_type_and_address(page):
-    # 1) Grab the address for city-inspection
-    address = "Unknown"
-    try:
-        addr_elem = await page.query_selector("a[href*='viewServiceMap']")
-        if addr_elem:
-            address = (await addr_elem.inner_text()).strip()
-    except Exception:
-        pass
+    return select_work_order(table)
 
-    # 2) Read the packageName <b> text for actual package info
-    package_info = ""
-    try:
-        pkg_elem = await page.query_selector(".packageName.text-indent b")
-        if pkg_elem:
-            package_info = (await pkg_elem.inner_text()).strip()
-    except Exception:
-        pass
+def classify_job_type(package_info, desc_text, address):
+    """Map the WO package name + description to the job type label used in exports."""
     pkg_lower = package_info.lower()
-
-    # 3) Grab the description (for connectorized check)
-    desc_text = ""
-    try:
-        desc_elem = await page.query_selector("td.detailHeader:has-text('Description:') + td.detailData")
-        if desc_elem:
-            desc_text = (await desc_elem.inner_text()).strip().lower()
-        else:
-            # fallback for XPath
-            desc_elem = await page.query_selector("//td[contains(text(), 'Description:')]/following-sibling::td[1]")
-            if desc_elem:
-                desc_text = (await desc_elem.inner_text()).strip().lower()
-    except Exception:
-        pass
+    desc_text = desc_text.lower()
 
     # 4) OFFICIAL 5 Gig check 
     if "5 gig" in pkg_lower and "2.5" not in pkg_lower:
@@ -398,11 +488,11 @@ async def get_job_type_and_address(page):
         else:
             job_type = "5 Gig Fiber Bundle"       if has_phone else "5 Gig Naked Fiber"
 
-        return job_type, address
+        return job_type
 
     # 5) Conversion Fallback: no package + Jefferson City → 5 Gig Conversion (until IT fixes the WO)
     if not package_info and "jefferson city" in address.lower():
-        return "5 Gig Conversion", address
+        return "5 Gig Conversion"
 
     # 6) 2.5G branch
     if "2.5" in pkg_lower:
@@ -414,7 +504,7 @@ async def get_job_type_and_address(page):
         else:
             job_type = "2.5G Fiber Bundle"       if has_phone else "2.5G Naked Fiber"
 
-        return job_type, address
+        return job_type
 
     # 7) OTHERWISE: your existing Connectorized / Bundle / Naked logic
     is_connectorized = "connectorized" in desc_text
@@ -425,55 +515,99 @@ async def get_job_type_and_address(page):
     else:
         job_type = "Fiber Bundle"       if has_phone else "Naked Fiber"
 
-    return job_type, address
+    return job_type
+
+async def get_job_type_and_address(page):
+    # 1) Grab the address for city-inspection
+    address = "Unknown"
+    try:
+        addr_elem = await page.query_selector("a[href*='viewServiceMap']")
+        if addr_elem:
+            address = (await addr_elem.inner_text()).strip()
+    except Exception:
+        pass
+
+    # 2) Read the packageName <b> text for actual package info
+    package_info = ""
+    try:
+        pkg_elem = await page.query_selector(".packageName.text-indent b")
+        if pkg_elem:
+            package_info = (await pkg_elem.inner_text()).strip()
+    except Exception:
+        pass
 
-async def extract_wo_date(page, fallback_date=None):
+    # 3) Grab the description (for connectorized check)
+    desc_text = ""
+    try:
+        desc_elem = await page.query_selector("td.detailHeader:has-text('Description:') + td.detailData")
+        if desc_elem:
+            desc_text = (await desc_elem.inner_text()).strip().lower()
+        else:
+            # fallback for XPath
+            desc_elem = await page.query_selector("//td[contains(text(), 'Description:')]/following-sibling::td[1]")
+            if desc_elem:
+                desc_text = (await desc_elem.inner_text()).strip().lower()
+    except Exception:
+        pass
+
+    return classify_job_type(package_info, desc_text, address), address
+
+def parse_wo_date_text(text, fallback_date=None):
+    """Pull the Fiber Install date out of the #scheduledEventList text as M-D-YY."""
+    text = re.sub(r"<.*?>", "", text)
+    lines = text.splitlines()
+    fiber_line = next(
+        (line for line in lines if re.search(r"fiber.*install", line, re.I)), ""
+    )
+    date_match = re.search(r"(\d{4})-(\d{2})-(\d{2})", fiber_line)
+    if date_match:
+        return format_job_date(datetime.strptime(date_match.group(0), "%Y-%m-%d"))
+
+    # Fallbacks (as above)
+    alt_match = re.search(r"(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})", fiber_line)
+    if alt_match:
+        try:
+            mm, dd, yy = map(int, alt_match.groups())
+            if yy < 100:  # Two-digit year
+                yy += 2000
+            return format_job_date(datetime(yy, mm, dd))
+        except Exception:
+            pass
+
+    if fallback_date:
+        return fallback_date
+    return "Unknown"
+
+# Resolves as soon as #scheduledEventList shows a date or the Fiber Install event
+WO_DATE_READY_JS = """
+() => {
+    const el = document.querySelector("#scheduledEventList");
+    if (!el) return false;
+    const text = el.innerText;
+    return /\\d{4}-\\d{2}-\\d{2}/.test(text) || (text.includes("Fiber") && text.includes("Install"));
+}
+"""
+
+async def extract_wo_date(page, fallback_date=None, timer=None):
+    """
+    Read the Fiber Install date off a WO page. If a StageTimer is given, the
+    wait for the event list to fill in is recorded as its date_wait stage.
+    """
+    t0 = time.perf_counter()
     try:
         # Wait for the scheduled event section to load
         await page.wait_for_selector("#scheduledEventList", timeout=10_000)
 
-        # Now poll until the date string appears or timeout reached
-        deadline = asyncio.get_event_loop().time() + 8  # up to 8 extra seconds
-        date_pattern = re.compile(r"\d{4}-\d{2}-\d{2}")
-
-        while True:
-            text = (await page.locator("#scheduledEventList").inner_text()).strip()
-            if date_pattern.search(text):
-                break
-            # Also break if the content is NOT a spinner/loader, e.g., contains "Fiber Install"
-            if "Fiber" in text and "Install" in text:
-                break
-            if asyncio.get_event_loop().time() > deadline:
-                break
-            await asyncio.sleep(0.25)
-
-        # Continue as before
-        text = re.sub(r"<.*?>", "", text)
-        lines = text.splitlines()
-        fiber_line = next(
-            (line for line in lines if re.search(r"fiber.*install", line, re.I)), ""
-        )
-        date_match = re.search(r"(\d{4})-(\d{2})-(\d{2})", fiber_line)
-        if date_match:
-            parsed_date = datetime.strptime(date_match.group(0), "%Y-%m-%d")
-            fmt = "%#m-%#d-%y" if os.name == "nt" else "%-m-%-d-%y"
-            return parsed_date.strftime(fmt)
-
-        # Fallbacks (as above)
-        alt_match = re.search(r"(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})", fiber_line)
-        if alt_match:
-            try:
-                mm, dd, yy = map(int, alt_match.groups())
-                if yy < 100:  # Two-digit year
-                    yy += 2000
-                parsed_date = datetime(yy, mm, dd)
-                fmt = "%#m-%#d-%y" if os.name == "nt" else "%-m-%-d-%y"
-                return parsed_date.strftime(fmt)
-            except Exception:
-                pass
+        # Then for its content, checked in-page on every frame instead of polling from here
+        try:
+            await page.wait_for_function(WO_DATE_READY_JS, timeout=8_000)
+        except PlaywrightTimeout:
+            pass  # read whatever is there, as before
 
-        if fallback_date:
-            return fallback_date
+        text = (await page.locator("#scheduledEventList").inner_text()).strip()
+        if timer is not None:
+            timer.add("date_wait", time.perf_counter() - t0)
+        return parse_wo_date_text(text, fallback_date)
 
     except Exception as e:
         print(f"⚠️ Could not extract WO date: {e}")
@@ -546,18 +680,23 @@ async def assign_contractor(page, wo_number, desired_contractor_full, log=print)
     except Exception as e:
         log(f"❌ Contractor assignment process failed for WO #{wo_number}")
 
-def prompt_reassignment(root, spread_file, log_func=print):
+def prompt_reassignment(root, spread_file, log_func=print, service=None):
     """
     Pops up a modal dialog asking to apply contractor reassignments.
-    If user agrees, runs the reassignment asynchronously on a background thread.
+    If user agrees, runs the reassignment asynchronously on a background thread
+    (or on the warm BrowserService loop, if one is given).
     """
     def start_reassignment():
         popup.destroy()
+        if service is not None:
+            service.submit(apply_spread_changes(spread_file, log_func, service=service))
+            return
         threading.Thread(target=lambda: asyncio.run(apply_spread_changes(spread_file, log_func)), daemon=True).start()
 
     def cancel():
         popup.destroy()
 
+    import tkinter as tk
     popup = tk.Toplevel(root)
     popup.title("Apply Spread Changes?")
     tk.Label(popup, text="Apply contractor reassignments now?").pack(padx=20, pady=10)
@@ -571,21 +710,26 @@ def prompt_reassignment(root, spread_file, log_func=print):
     popup.transient(root)
     popup.wait_window()
 
-async def apply_spread_changes(spread_file, log_func=print):
+async def apply_spread_changes(spread_file, log_func=print, service=None):
     from scrape_runner import init_playwright_page
     from spreader import parse_moved_jobs_from_spread
     jobs = parse_moved_jobs_from_spread(spread_file)
     if not jobs:
         log_func("No moved jobs to reassign.")
         return
-    playwright, browser, context, page = await init_playwright_page(headless=True)
+    if service is not None:
+        # Warm, already logged-in context from the app's browser service
+        context, page = await service.lease()
+    else:
+        playwright, browser, context, page = await init_playwright_page(headless=True)
     try:
-        await handle_login(page, log=log_func)
+        if service is None:
+            await handle_login(page, log=log_func)
         for job in jobs:
             wo_number = job["wo"]
             desired_contractor = job["contractor"]
             try:
-                url = f"http://inside.sockettelecom.com/workorders/view.php?nCount={wo_number}"
+                url = WORK_ORDER_URL_TEMPLATE.format(wo_number)
                 await page.goto(url)
                 await asyncio.sleep(1)  # let page settle
                 await assign_contractor(page, wo_number, desired_contractor, log=log_func)
@@ -593,10 +737,13 @@ async def apply_spread_changes(spread_file, log_func=print):
                 log_func(f"Failed to process WO {wo_number}: {e}")
         log_func("Done applying spread changes.")
     finally:
-        await page.close()
-        await context.close()
-        await browser.close()
-        await playwright.stop()
+        if service is not None:
+            await service.release(context, page)
+        else:
+            await page.close()
+            await context.close()
+            await browser.close()
+            await playwright.stop()
 
 # Time + Data
 def get_output_tag(start, end): #File date stamp
@@ -633,189 +780,158 @@ def company_sort_key(name):
     else:
         return (1, name.lower()) # middle, alphabetically
 
+def is_stale_result(job):
+    """A previous result that can't be trusted as-is and needs a fresh detail scrape."""
+    if job.get("company") in (None, "", "Unknown", "Junk"):
+        # Junk is the noon bucket from export_txt, so the real contractor is lost
+        return True
+    return any(job.get(k) in (None, "", "Unknown") for k in ("date", "type", "address", "wo"))
+
+def plan_incremental(raw_jobs, previous_jobs):
+    """
+    Split calendar entries into (to_fetch, reused) against a previous run.
+    An entry is reused when the previous run has the same CID, name and time
+    slot (and date, when the calendar provides one) and that result isn't stale;
+    everything else is new, moved or stale and gets re-scraped.
+    """
+    prev_by_cid = defaultdict(list)
+    for prev in previous_jobs:
+        prev_by_cid[prev.get("cid")].append(prev)
+
+    to_fetch, reused = [], []
+    for job in raw_jobs:
+        candidates = prev_by_cid.get(job.get("cid"), [])
+        match = None
+        for prev in candidates:
+            if is_stale_result(prev):
+                continue
+            if prev.get("time") != job.get("time") or prev.get("name") != job.get("name"):
+                continue
+            if job.get("date") and parse_date(prev["date"]) != parse_date(job["date"]):
+                continue
+            match = prev
+            break
+
+        if match is None:
+            to_fetch.append(job)
+            continue
+        # Each previous row backs at most one calendar entry
+        candidates.remove(match)
+        reused.append({
+            "company": match["company"],
+            "date":    match["date"],
+            "time":    job.get("time"),
+            "name":    job.get("name"),
+            "cid":     job.get("cid"),
+            "type":    match["type"],
+            "address": match["address"],
+            "wo":      match["wo"],
+        })
+    return to_fetch, reused
+
 # I/O
 def generate_changes_file(old_list, new_list, changes_filename):
-    def stringify(j):
-        return f"{j['time']} - {j['name']} - {j['cid']} - {j['type']} - {j['address']} - WO {j['wo']}"
-
-    # build sets of lines per company
-    old_by_co = defaultdict(set)
-    new_by_co = defaultdict(set)
-    for j in old_list:
-        old_by_co[j['company']].add(stringify(j))
-    for j in new_list:
-        new_by_co[j['company']].add(stringify(j))
-
-    # all companies seen
-    companies = sorted(set(old_by_co) | set(new_by_co))
-
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    path = os.path.join(OUTPUT_DIR, changes_filename)
-
-    with open(path, 'w', encoding='utf-8') as f:
-        for co in companies:
-            f.write(f"{co}\n")
-            f.write("Added:\n")
-            for line in sorted(new_by_co[co] - old_by_co.get(co, set())):
-                f.write(f"  {line}\n")
-            f.write("\nRemoved:\n")
-            for line in sorted(old_by_co[co] - new_by_co.get(co, set())):
-                f.write(f"  {line}\n")
-            f.write("\n")
-
-    return path
+    from job_diff import diff_jobs, write_changes
+    return write_changes(diff_jobs(old_list, new_list), export_path(changes_filename, "Changes.txt"))
+
+def export_path(filename, default="Jobs.txt"):
+    """filename as given when it has a directory, otherwise inside OUTPUT_DIR."""
+    if filename and os.path.dirname(filename):
+        return filename
+    return os.path.join(OUTPUT_DIR, os.path.basename(filename) if filename else default)
 
 def export_txt(jobs, filename=None):
-    jobs_by_company = defaultdict(lambda: defaultdict(list))
-    
-    # Assign noon jobs to Junk bucket before grouping
-    for job in jobs:
-        company = "Junk" if job.get("time") == "12:00" else job.get("company")
-        job_copy = job.copy()
-        job_copy["company"] = company
-        jobs_by_company[company][job_copy["date"]].append(job_copy)
-
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    out_name = os.path.basename(filename) if filename else "Jobs.txt"
-    out_path = os.path.join(OUTPUT_DIR, out_name)
-
-    with open(out_path, "w", encoding="utf-8") as f:
-        for company in sorted(jobs_by_company.keys(), key=company_sort_key):
-            f.write(f"{company}\n\n")
-            days = jobs_by_company[company]
-
-            # Sort dates chronologically
-            sorted_dates = sorted(days.keys(), key=parse_date)
-
-            for date in sorted_dates:
-                f.write(f"{date}\n")
-                entries = days[date]
-
-                # Sort entries by time, then name
-                entries_sorted = sorted(
-                    entries,
-                    key=lambda j: (get_sort_key(j['time']), j['name'].lower())
-                )
-                for job in entries_sorted:
-                    f.write(
-                        f"{job['time']} - {job['name']} - {job['cid']} - "
-                        f"{job['type']} - {job['address']} - WO {job['wo']}\n"
-                    )
-                f.write("\n")
-            f.write("\n")
+    from job_index import JobIndex, txt_company, write_txt
+    write_txt(JobIndex(jobs, company_of=txt_company), export_path(filename))
 
 def export_excel(jobs, filename=None):
-    jobs_by_company = defaultdict(lambda: defaultdict(list))
-    for job in jobs:
-        jobs_by_company[job["company"]][job["date"]].append(job)
-
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    out_name = os.path.basename(filename) if filename else "Jobs.txt"
-    out_path = os.path.join(OUTPUT_DIR, out_name)
-
-    rows = []
-    for company, days in jobs_by_company.items():
-        rows.append([company])
-        for date, entries in sorted(days.items()):
-            rows.append([date])
-            for job in sorted(entries, key=lambda j: (get_sort_key(j['time']), j['name'].lower())):
-                rows.append([
-                    job['time'],
-                    job['name'],
-                    job['cid'],
-                    job['type'],
-                    job['address'],
-                    f"WO {job['wo']}"
-                ])
-            rows.append([])
-        rows.append([])
-
-    # Write to Excel
-    df = pd.DataFrame(rows)
-    
-    df.to_excel(out_path, index=False, header=False)
-
-    # Autofit column widths
-    wb = load_workbook(out_path)
-    ws = wb.active
-    for col in ws.columns:
-        max_length = max(len(str(cell.value or "")) for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_length + 2
-    wb.save(out_path)
-
-def parse_imported_jobs(file_path):
-    ext = os.path.splitext(file_path)[1].lower()
-    jobs = []
-
-    if ext == ".txt":
-        with open(file_path, "r", encoding="utf-8") as f:
-            current_company = None
-            current_date    = None
-
-            for raw in f:
-                line = raw.strip()
-                if not line:
-                    continue
-
-                # 1) Company header: any line without " - " and no digits
-                if " - " not in line and not any(c.isdigit() for c in line):
-                    current_company = line
-                    continue
-
-                # 2) Date header: matches M-D-YY or M-D-YYYY
-                if re.match(r'^\d{1,2}-\d{1,2}-\d{2,4}$', line):
-                    current_date = line
-                    continue
-
-                # 3) Job line
-                if " - " in line and "WO" in line:
+    from job_index import JobIndex, write_excel
+    write_excel(JobIndex(jobs), export_path(filename, "Jobs.xlsx"))
+
+# Imported job files: company headers, M-D-YY(YY) date headers and job lines
+IMPORT_DATE_RE = re.compile(r"\d{1,2}-\d{1,2}-\d{2,4}")
+_has_digit = re.compile(r"\d").search
+IMPORT_PROGRESS_EVERY = 2000  # lines or rows between progress callbacks
+
+def _imported_job(company, date, parts):
+    time, name, cid, typ, addr, wo = parts[:6]
+    return {
+        "company": company,
+        "date":    date,
+        "time":    time,
+        "name":    name,
+        "cid":     cid,
+        "type":    typ,
+        "address": addr,
+        "wo":      wo.replace("WO ", "")
+    }
+
+def _iter_txt_jobs(file_path, progress=None):
+    total = os.path.getsize(file_path)
+    current_company = None
+    current_date    = None
+    with open(file_path, "r", encoding="utf-8") as f:
+        for n, raw in enumerate(f, start=1):
+            if progress and n % IMPORT_PROGRESS_EVERY == 0:
+                progress(f.buffer.tell(), total)
+            line = raw.strip()
+            if not line:
+                continue
+            # Headers never contain " - ", so one substring test sorts most lines
+            if " - " in line:
+                if "WO" in line:
                     parts = [p.strip() for p in line.split(" - ")]
                     if len(parts) >= 6:
-                        time, name, cid, typ, addr, wo = parts[:6]
-                        jobs.append({
-                            "company": current_company,
-                            "date":    current_date,
-                            "time":    time,
-                            "name":    name,
-                            "cid":     cid,
-                            "type":    typ,
-                            "address": addr,
-                            "wo":      wo.replace("WO ", "")
-                        })
-
-    elif ext == ".xlsx":
-        df = pd.read_excel(file_path, header=None)
+                        yield _imported_job(current_company, current_date, parts)
+            elif IMPORT_DATE_RE.fullmatch(line):
+                current_date = line
+            elif not _has_digit(line):
+                current_company = line
+    if progress:
+        progress(total, total)
+
+def _iter_xlsx_jobs(file_path, progress=None):
+    # Read-only streams the sheet; rows are classified from their cells directly
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        total = ws.max_row or 0
         current_company = None
         current_date    = None
-
-        for row in df.itertuples(index=False):
-            # flatten row to single string list
-            cells = [str(c).strip() for c in row if c and str(c).strip()]
+        for n, row in enumerate(ws.iter_rows(values_only=True), start=1):
+            if progress and n % IMPORT_PROGRESS_EVERY == 0:
+                progress(n, total)
+            cells = [c for c in row if c is not None and c != ""]
             if not cells:
                 continue
+            if len(cells) == 1:
+                value = cells[0]
+                if isinstance(value, datetime):
+                    current_date = format_job_date(value)
+                    continue
+                text = str(value).strip()
+                if IMPORT_DATE_RE.fullmatch(text):
+                    current_date = text
+                elif text and not _has_digit(text):
+                    current_company = text
+            elif len(cells) >= 6 and "WO" in str(cells[5]):
+                yield _imported_job(current_company, current_date, [str(c).strip() for c in cells])
+        if progress:
+            progress(total, total)
+    finally:
+        wb.close()
 
-            line = " - ".join(cells)
-            # same detection logic as above
-            if " - " not in line and not any(c.isdigit() for c in line):
-                current_company = line
-                continue
-            if re.match(r'^\d{1,2}-\d{1,2}-\d{2,4}$', line):
-                current_date = line
-                continue
-            if " - " in line and "WO" in line:
-                parts = [p.strip() for p in line.split(" - ")]
-                if len(parts) >= 6:
-                    time, name, cid, typ, addr, wo = parts[:6]
-                    jobs.append({
-                        "company": current_company,
-                        "date":    current_date,
-                        "time":    time,
-                        "name":    name,
-                        "cid":     cid,
-                        "type":    typ,
-                        "address": addr,
-                        "wo":      wo.replace("WO ", "")
-                    })
+def iter_imported_jobs(file_path, progress=None):
+    """
+    Jobs from a previous .txt or .xlsx export, one at a time. progress(done,
+    total) is called every few thousand lines (bytes for .txt, rows for .xlsx).
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".txt":
+        return _iter_txt_jobs(file_path, progress)
+    if ext == ".xlsx":
+        return _iter_xlsx_jobs(file_path, progress)
+    return iter(())
 
-    return jobs
+def parse_imported_jobs(file_path, progress=None):
+    return list(iter_imported_jobs(file_path, progress))
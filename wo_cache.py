@@ -0,0 +1,89 @@
+# wo_cache.py
+import os
+import re
+import time
+import sqlite3
+
+from utils import MISC_DIR
+
+CACHE_PATH = os.path.join(MISC_DIR, "wo_cache.sqlite")
+DEFAULT_TTL = 3 * 24 * 60 * 60  # 3 days; installs rarely get a new WO faster than that
+
+def _digits(value):
+    return re.sub(r"\D", "", str(value or ""))
+
+def _number_tokens(text):
+    # Whole numbers on the page, dashes dropped ("12-345" -> "12345")
+    return {_digits(token) for token in re.findall(r"\d[\d-]*", text)}
+
+def wo_page_matches(page_text, cid, wo_number):
+    """
+    A cached WO is only trusted if its page still shows that WO number and the
+    customer's CID, both as whole numbers and digits-only since the WO page may
+    format them differently. A WO that has since closed is caught by
+    select_work_order's In Process rule on the next lookup.
+    """
+    cid_digits = _digits(cid)
+    if not cid_digits or wo_number is None:
+        return False
+    numbers = _number_tokens(page_text or "")
+    return cid_digits in numbers and _digits(wo_number) in numbers
+
+class WOCache:
+    """
+    On-disk CID -> newest in-process Fiber Install WO (number + URL).
+    Entries older than ttl seconds are treated as missing.
+    """
+    def __init__(self, path=CACHE_PATH, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS wo_cache ("
+            "cid TEXT PRIMARY KEY, wo INTEGER NOT NULL, url TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, cid):
+        """Returns (url, wo_number) or None."""
+        row = self.conn.execute(
+            "SELECT url, wo, updated FROM wo_cache WHERE cid = ?", (cid,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        url, wo, updated = row
+        if time.time() - updated > self.ttl:
+            self.misses += 1
+            self._delete(cid)
+            return None
+        self.hits += 1
+        return url, wo
+
+    def put(self, cid, url, wo_number):
+        if not cid or not url or wo_number is None:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO wo_cache (cid, wo, url, updated) VALUES (?, ?, ?, ?)",
+            (cid, int(wo_number), url, time.time())
+        )
+        self.conn.commit()
+
+    def invalidate(self, cid):
+        self.invalidations += 1
+        self._delete(cid)
+
+    def _delete(self, cid):
+        self.conn.execute("DELETE FROM wo_cache WHERE cid = ?", (cid,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def summary(self):
+        return f"{self.hits} hits, {self.misses} misses, {self.invalidations} invalidated"